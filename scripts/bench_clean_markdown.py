@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DocxConverter.clean_markdown on large documents
+
+Builds a synthetic course-reader style document (200 pages of headings,
+paragraphs, bullet and numbered lists, with a fenced code block every few
+pages) and times the previous four-regex cleanup against the current
+single-pass version. Also checks that both produce identical output, allowing
+only the two intended differences:
+    - the regex version can leave two blank lines before a heading or list
+      item, the single pass always leaves one (Markdown renders both the same),
+      so outputs are compared with blank-line runs collapsed
+    - fenced code blocks pass through the single pass untouched, so for the
+      document with code blocks the comparison skips their contents
+
+Usage:
+    python3 scripts/bench_clean_markdown.py [--pages 200] [--repeat 5]
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from convert_docx import DocxConverter
+
+
+def clean_markdown_regex(markdown_text):
+    """The four-regex clean_markdown that the single pass replaced"""
+    # Remove extra whitespace
+    markdown_text = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_text)
+
+    # Fix heading spacing
+    markdown_text = re.sub(r'\n(#{1,6})', r'\n\n\1', markdown_text)
+    markdown_text = re.sub(r'(#{1,6}.*?)\n([^\n#])', r'\1\n\n\2', markdown_text)
+    # Clean up list formatting
+    markdown_text = re.sub(r'\n(\*|\d+\.)', r'\n\n\1', markdown_text)
+    markdown_text = markdown_text.strip()
+
+    return markdown_text
+
+
+def clean_markdown_single_pass(markdown_text):
+    # clean_markdown keeps no per-instance state
+    return DocxConverter.clean_markdown(None, markdown_text)
+
+
+def code_block(page):
+    return [
+        '```python',
+        f'def page_{page}():',
+        '',
+        '',
+        '',
+        '    # comment that the regex version treats as a heading',
+        '    return 1',
+        '```'
+    ]
+
+
+def build_document(pages, with_code=True):
+    """Synthetic mammoth-style markdown: about 60 lines per page"""
+    lines = []
+    for page in range(1, pages + 1):
+        lines.append(f'# Unit {page}')
+        lines.append('')
+        for section in range(1, 4):
+            lines.append(f'## Section {page}.{section}')
+            for paragraph in range(3):
+                lines.append(f'Paragraph {paragraph} of section {page}.{section} explains the idea '
+                             'in a few sentences of ordinary prose, as converted from a Word document.')
+                lines.append('')
+                lines.append('')
+            for item in range(4):
+                lines.append(f'* Bullet point {item} for section {page}.{section}')
+            lines.append('')
+            for item in range(1, 4):
+                lines.append(f'{item}. Numbered step {item}')
+            lines.append('   ')
+            lines.append('')
+        if with_code and page % 5 == 0:
+            lines.append('')
+            lines.extend(code_block(page))
+            lines.append('')
+    return '\n'.join(lines)
+
+
+def collapse_blank_lines(markdown_text):
+    """Collapse runs of blank lines to one, the single pass's intended difference"""
+    return re.sub(r'\n{3,}', '\n\n', markdown_text)
+
+
+def without_code_blocks(markdown_text):
+    """Drop everything from an opening ``` fence through its closing fence"""
+    return re.sub(r'```python\n.*?\n```', '```', markdown_text, flags=re.DOTALL)
+
+
+def time_call(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark clean_markdown on a large synthetic document')
+    parser.add_argument('--pages', type=int, default=200, help='Number of synthetic pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    ok = True
+
+    plain = build_document(args.pages, with_code=False)
+    if collapse_blank_lines(clean_markdown_regex(plain)) != clean_markdown_single_pass(plain):
+        print("❌ Outputs differ on the document without code blocks")
+        ok = False
+    else:
+        print("✅ Identical output on the document without code blocks (blank-line runs collapsed)")
+
+    document = build_document(args.pages)
+    print(f"Document: {args.pages} pages, {document.count(chr(10)) + 1} lines, {len(document) / 1e6:.1f} MB")
+
+    regex_time, regex_result = time_call(clean_markdown_regex, document, args.repeat)
+    single_time, single_result = time_call(clean_markdown_single_pass, document, args.repeat)
+    print(f"   four regex passes: {regex_time * 1000:8.1f} ms")
+    print(f"   single pass:       {single_time * 1000:8.1f} ms  ({regex_time / single_time:.1f}x)")
+
+    if collapse_blank_lines(without_code_blocks(regex_result)) != without_code_blocks(single_result):
+        print("❌ Outputs differ outside fenced code blocks")
+        ok = False
+    elif any('\n'.join(code_block(page)) not in single_result for page in range(5, args.pages + 1, 5)):
+        print("❌ Fenced code blocks were not passed through unchanged")
+        ok = False
+    else:
+        print("✅ Identical output outside fenced code blocks, which pass through unchanged")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,240 +5,250 @@ Only checks for issues that would appear during normal Jekyll builds
 """
 
 import os
+import re
 import sys
+import argparse
+import hashlib
+import json
+import subprocess
 import warnings
 from pathlib import Path
 import nbformat
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import time
 
-def check_notebook_for_real_warnings(notebook_path_str):
-    """Check notebook for warnings that actually show up during builds"""
-    notebook_path = Path(notebook_path_str)
+# Lone UTF-16 surrogates (e.g. from pasted text) cannot be encoded as UTF-8
+SURROGATE_PATTERN = re.compile('[\ud800-\udfff]')
+
+# Validation results keyed by notebook content hash, reused while the notebook and nbformat are unchanged
+VALIDATION_CACHE = Path('.build_cache') / 'notebook_validation.json'
+
+def load_validation_cache():
+    """Load cached results, discarding them if they came from a different nbformat version"""
+    try:
+        with open(VALIDATION_CACHE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('nbformat_version') == nbformat.__version__:
+            return cache.get('notebooks', {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+def save_validation_cache(entries):
+    """Write the validation cache atomically"""
+    VALIDATION_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = VALIDATION_CACHE.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'nbformat_version': nbformat.__version__, 'notebooks': entries}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, VALIDATION_CACHE)
+
+def notebooks_changed_since(ref, base_dir):
+    """Notebooks modified (committed, staged, unstaged or untracked) since a git ref"""
+    changed = subprocess.run(
+        ['git', 'diff', '--name-only', ref, '--', '*.ipynb'],
+        cwd=base_dir, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    untracked = subprocess.run(
+        ['git', 'ls-files', '--others', '--exclude-standard', '--', '*.ipynb'],
+        cwd=base_dir, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return {(base_dir / name).resolve() for name in changed + untracked}
+
+def collect_notebook_issues(nb, read_warnings=()):
+    """
+    Collect build warnings for an already-loaded notebook
+    
+    Validates with nbformat (alongside any warnings recorded while reading) and checks
+    for Unicode problems that would break conversion. Shared with
+    convert_notebooks.py --validate so both report the same structured issues.
+    """
     issues = []
     
-    try:
-        # Check for nbformat warnings (the main real issue we see)
-        with warnings.catch_warnings(record=True) as w:
-            warnings.simplefilter("always")
-            
-            with open(notebook_path, 'r', encoding='utf-8') as f:
-                nb = nbformat.read(f, as_version=nbformat.NO_CONVERT)
-            
-            # Validate to trigger warnings
-            nbformat.validate(nb)
-            
-            # Collect all warnings
-            for warning in w:
+    # Validate to trigger warnings
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        nbformat.validate(nb)
+    
+    # Collect all warnings
+    for warning in list(read_warnings) + w:
+        issues.append({
+            'type': 'warning',
+            'category': str(warning.category.__name__),
+            'message': str(warning.message),
+            'source': 'nbformat'
+        })
+    
+    # Check for Unicode encoding issues that would break conversion; a single encode per
+    # cell only fails on surrogates, so clean cells never need a per-character scan
+    for cell in nb.cells:
+        if 'source' in cell:
+            cell_source = cell['source']
+            if isinstance(cell_source, list):
+                cell_source = ''.join(cell_source)
+            try:
+                cell_source.encode('utf-8')
+            except UnicodeEncodeError as e:
+                if SURROGATE_PATTERN.search(cell_source):
+                    message = 'Cell contains surrogate Unicode characters that cannot be encoded'
+                else:
+                    message = f'Unicode encoding error: {str(e)}'
                 issues.append({
-                    'type': 'warning',
-                    'category': str(warning.category.__name__),
-                    'message': str(warning.message),
-                    'source': 'nbformat'
+                    'type': 'error',
+                    'category': 'UnicodeEncodeError',
+                    'message': message,
+                    'source': 'conversion'
                 })
-        
-        # Check for Unicode encoding issues that would break conversion
-        try:
-            # Try to simulate what the conversion script does - convert to string and encode
-            nb_content = str(nb)
-            nb_content.encode('utf-8')
-            
-            # Also check individual cell content for problematic characters
-            for cell in nb.cells:
-                if 'source' in cell:
-                    cell_source = cell['source']
-                    if isinstance(cell_source, list):
-                        cell_source = ''.join(cell_source)
-                    # Try to encode the cell content
-                    cell_source.encode('utf-8')
-                    
-                    # Check for surrogate characters specifically
-                    if any(0xD800 <= ord(char) <= 0xDFFF for char in cell_source):
-                        issues.append({
-                            'type': 'error',
-                            'category': 'UnicodeEncodeError',
-                            'message': 'Cell contains surrogate Unicode characters that cannot be encoded',
-                            'source': 'conversion'
-                        })
-        except UnicodeEncodeError as e:
-            issues.append({
-                'type': 'error',
-                'category': 'UnicodeEncodeError',
-                'message': f'Unicode encoding error: {str(e)}',
-                'source': 'conversion'
-            })
-        
-        return {
-            'path': notebook_path_str,
-            'issues': issues,
-            'error': None
-        }
-        
-    except Exception as e:
-        return {
-            'path': notebook_path_str,
-            'issues': [],
-            'error': str(e)
-        }
+    
+    return issues
 
-def fix_notebook_issues(notebook_path_str, issues):
-    """Fix issues that can be automatically resolved"""
+def check_notebook_for_real_warnings(notebook_path_str, known_sha256=None, fix=False):
+    """
+    Check notebook for warnings that actually show up during builds
+    
+    If known_sha256 matches the notebook's content hash, validation is skipped
+    and the result is marked 'cached' so the caller can reuse its stored result.
+    With fix=True, fixable issues are repaired on the notebook already loaded here
+    and the result's 'fixed' lists what was written back.
+    """
     notebook_path = Path(notebook_path_str)
-    fixed_issues = []
     
     try:
-        with open(notebook_path, 'r', encoding='utf-8') as f:
-            nb = nbformat.read(f, as_version=nbformat.NO_CONVERT)
-        
-        needs_save = False
+        with open(notebook_path, 'rb') as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if sha256 == known_sha256:
+            return {
+                'path': notebook_path_str,
+                'sha256': sha256,
+                'cached': True
+            }
         
-        # Fix MissingIDFieldWarning by normalizing
-        for issue in issues:
-            if 'MissingIDFieldWarning' in issue['message'] or 'missing an id field' in issue['message']:
-                nb = nbformat.validator.normalize(nb)[1]
-                needs_save = True
-                fixed_issues.append('MissingIDFieldWarning')
-                break
-        
-        # Fix Unicode encoding issues
-        for issue in issues:
-            if issue['category'] == 'UnicodeEncodeError':
-                # Clean up problematic Unicode characters in cells
-                for cell in nb.cells:
-                    if 'source' in cell:
-                        cell_source = cell['source']
-                        if isinstance(cell_source, list):
-                            cell_source = ''.join(cell_source)
-                        
-                        # Remove or replace surrogate characters
-                        cleaned_source = ''
-                        for char in cell_source:
-                            if 0xD800 <= ord(char) <= 0xDFFF:
-                                # Replace surrogate characters with a replacement character
-                                cleaned_source += '\uFFFD'  # Unicode replacement character
-                            else:
-                                cleaned_source += char
-                        
-                        # Update the cell source if changes were made
-                        if cleaned_source != cell_source:
-                            if isinstance(cell['source'], list):
-                                cell['source'] = [cleaned_source]
-                            else:
-                                cell['source'] = cleaned_source
-                            needs_save = True
-                
-                if needs_save:
-                    fixed_issues.append('UnicodeEncodeError')
-                break
+        # Check for nbformat warnings (the main real issue we see)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            content = data.decode('utf-8')
+            nb = nbformat.reads(content, as_version=nbformat.NO_CONVERT)
         
-        # Save if changes were made
-        if needs_save:
-            with open(notebook_path, 'w', encoding='utf-8') as f:
-                nbformat.write(nb, f)
+        issues = collect_notebook_issues(nb, w)
         
-        return {
+        result = {
             'path': notebook_path_str,
-            'success': True,
-            'fixed': fixed_issues,
+            'sha256': sha256,
+            'issues': issues,
             'error': None
         }
         
+        if fix and issues:
+            try:
+                nb, result['fixed'] = apply_notebook_fixes(nb, issues)
+                # validate() already fills in missing cell ids on the loaded notebook, so compare
+                # the serialized result against the file on disk to decide whether to write
+                if not (result['fixed'] and write_notebook_atomic(nb, notebook_path, content)):
+                    result['fixed'] = []
+            except Exception as e:
+                result['fixed'] = []
+                result['fix_error'] = str(e)
+        
+        return result
+        
     except Exception as e:
         return {
             'path': notebook_path_str,
-            'success': False,
-            'fixed': [],
+            'issues': [],
             'error': str(e)
         }
 
-def main():
-    base_dir = Path.cwd()
-    notebook_files = list(base_dir.glob("**/*.ipynb"))
-    
-    # Filter out notebooks in excluded directories
-    excluded_dirs = {'_site', '.git', 'venv', '__pycache__', '.ipynb_checkpoints', 'node_modules'}
-    notebook_files = [
-        nb for nb in notebook_files 
-        if not any(part in excluded_dirs for part in nb.parts)
-    ]
-    
-    total_notebooks = len(notebook_files)
-    print(f"🔍 Checking {total_notebooks} notebooks for real build warnings...")
+def apply_notebook_fixes(nb, issues):
+    """
+    Fix issues that can be automatically resolved on a loaded notebook
     
-    problematic_notebooks = []
-    all_issues = {}
-    processed = 0
-    start_time = time.time()
+    Returns (notebook, fixed issue categories). Callers compare the result with the
+    original document before writing, so unchanged notebooks are never rewritten.
+    """
+    fixed_issues = []
+    categories = {issue['category'] for issue in issues}
     
-    # Use parallel processing for speed
-    max_workers = min(8, os.cpu_count() or 1)
+    # Fix MissingIDFieldWarning by normalizing
+    if any('MissingIDFieldWarning' in issue['message'] or 'missing an id field' in issue['message']
+           for issue in issues):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            nb = nbformat.validator.normalize(nb)[1]
+        fixed_issues.append('MissingIDFieldWarning')
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_notebook = {
-            executor.submit(check_notebook_for_real_warnings, str(nb)): nb 
-            for nb in notebook_files
-        }
-        
-        # Process results as they complete
-        for future in as_completed(future_to_notebook):
-            result = future.result()
-            processed += 1
-            
-            # Progress reporting
-            elapsed = time.time() - start_time
-            rate = processed / elapsed if elapsed > 0 else 0
-            eta = (total_notebooks - processed) / rate if rate > 0 else 0
-            
-            current_file = Path(result['path']).name
-            print(f"\r🔍 {processed}/{total_notebooks} ({processed/total_notebooks*100:.1f}%) "
-                  f"| {rate:.1f}/s | ETA: {eta:.0f}s | {current_file[:40]}", 
-                  end='', flush=True)
-            
-            if result['issues']:
-                rel_path = Path(result['path']).relative_to(base_dir)
-                issue_count = len(result['issues'])
-                
-                print(f"\n📝 {len(problematic_notebooks) + 1}. {rel_path} ({issue_count} warnings)")
-                
-                # Group issues by category and count them
-                issue_counts = {}
-                for issue in result['issues']:
-                    category = issue['category']
-                    if category not in issue_counts:
-                        issue_counts[category] = []
-                    issue_counts[category].append(issue['message'])
-                
-                # Show counts per category for this notebook
-                for category, messages in issue_counts.items():
-                    print(f"    🔸 {category}: {len(messages)} occurrence(s)")
-                    # Show first message as example
-                    if messages:
-                        first_msg = messages[0]
-                        if len(first_msg) > 80:
-                            first_msg = first_msg[:77] + "..."
-                        print(f"       Example: {first_msg}")
+    # Fix Unicode encoding issues
+    if 'UnicodeEncodeError' in categories:
+        changed = False
+        # Replace surrogate characters with the Unicode replacement character
+        for cell in nb.cells:
+            if 'source' in cell:
+                cell_source = cell['source']
+                if isinstance(cell_source, list):
+                    cleaned_source = [SURROGATE_PATTERN.sub('\uFFFD', line) for line in cell_source]
+                else:
+                    cleaned_source = SURROGATE_PATTERN.sub('\uFFFD', cell_source)
                 
-                problematic_notebooks.append(result['path'])
-                all_issues[result['path']] = result['issues']
-                
-            elif result['error']:
-                rel_path = Path(result['path']).relative_to(base_dir)
-                print(f"\n❌ Error checking {rel_path}: {result['error']}")
+                # Update the cell source if changes were made
+                if cleaned_source != cell_source:
+                    cell['source'] = cleaned_source
+                    changed = True
+        
+        if changed:
+            fixed_issues.append('UnicodeEncodeError')
     
-    print("\n")  # New line after progress
+    return nb, fixed_issues
+
+def write_notebook_atomic(nb, notebook_path, original_content):
+    """
+    Write a notebook via a temp file and rename so an interrupted fix never truncates it
     
-    elapsed_total = time.time() - start_time
+    Returns False without writing when the serialized notebook matches original_content.
+    """
+    notebook_path = Path(notebook_path)
+    content = nbformat.writes(nb)
+    if not content.endswith('\n'):
+        content += '\n'
+    if content == original_content:
+        return False
+    tmp_path = notebook_path.with_name(notebook_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, notebook_path)
+    return True
+
+def print_notebook_issues(number, rel_path, issues):
+    """Print one notebook's issues grouped by category, with an example message for each"""
+    print(f"\n📝 {number}. {rel_path} ({len(issues)} warnings)")
+    
+    # Group issues by category and count them
+    issue_counts = {}
+    for issue in issues:
+        category = issue['category']
+        if category not in issue_counts:
+            issue_counts[category] = []
+        issue_counts[category].append(issue['message'])
     
-    if problematic_notebooks:
+    # Show counts per category for this notebook
+    for category, messages in issue_counts.items():
+        print(f"    🔸 {category}: {len(messages)} occurrence(s)")
+        # Show first message as example
+        if messages:
+            first_msg = messages[0]
+            if len(first_msg) > 80:
+                first_msg = first_msg[:77] + "..."
+            print(f"       Example: {first_msg}")
+
+def print_issue_summary(all_issues, base_dir, errors=None):
+    """Print the overall warning summary for {notebook_path: issues}, plus {notebook_path: error} for notebooks that failed"""
+    if all_issues:
         total_issues = sum(len(issues) for issues in all_issues.values())
-        print(f"⚠️ Found {len(problematic_notebooks)} notebooks with {total_issues} total warnings:")
+        print(f"⚠️ Found {len(all_issues)} notebooks with {total_issues} total warnings:")
         
         # Summarize issue types across all notebooks
         issue_summary = {}
         notebooks_per_issue = {}
         for notebook_path, issues_list in all_issues.items():
-            rel_path = Path(notebook_path).relative_to(base_dir)
+            rel_path = Path(os.path.relpath(notebook_path, base_dir))
             for issue in issues_list:
                 issue_key = issue['category']
                 issue_summary[issue_key] = issue_summary.get(issue_key, 0) + 1
@@ -271,7 +281,7 @@ def main():
             print(f"\n📝 Notebooks with Issues:")
         notebook_list = []
         for notebook_path, issues_list in all_issues.items():
-            rel_path = Path(notebook_path).relative_to(base_dir)
+            rel_path = Path(os.path.relpath(notebook_path, base_dir))
             warning_count = len(issues_list)
             
             # Get breakdown by issue type for this notebook
@@ -312,34 +322,161 @@ def main():
             fixable_types = [t for t in all_issue_types if t in ['MissingIDFieldWarning', 'UnicodeEncodeError']]
             if fixable_types:
                 print(f"- **Fixable issue types**: {', '.join(fixable_types)} can be automatically fixed with `make convert-fix`")
-    else:
+    elif not errors:
         print("✅ No build warnings found")
     
+    if errors:
+        print(f"\n❌ {len(errors)} notebook(s) failed:")
+        for notebook_path in sorted(errors):
+            print(f"  - `{os.path.relpath(notebook_path, base_dir)}`: {errors[notebook_path]}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Check notebooks for real conversion warnings')
+    parser.add_argument('--fix', action='store_true',
+                        help='Fix MissingIDFieldWarning and UnicodeEncodeError issues')
+    parser.add_argument('--since', metavar='REF',
+                        help='Only check notebooks changed since this git ref (e.g. HEAD, origin/main)')
+    args = parser.parse_args()
+    
+    base_dir = Path.cwd()
+    notebook_files = list(base_dir.glob("**/*.ipynb"))
+    
+    # Filter out notebooks in excluded directories
+    excluded_dirs = {'_site', '.git', 'venv', '__pycache__', '.ipynb_checkpoints', 'node_modules'}
+    notebook_files = [
+        nb for nb in notebook_files 
+        if not any(part in excluded_dirs for part in nb.parts)
+    ]
+    
+    # Forget cached results for notebooks that no longer exist
+    cache = load_validation_cache()
+    existing = {str(nb.relative_to(base_dir)) for nb in notebook_files}
+    cache = {key: entry for key, entry in cache.items() if key in existing}
+    
+    if args.since:
+        changed = notebooks_changed_since(args.since, base_dir)
+        notebook_files = [nb for nb in notebook_files if nb.resolve() in changed]
+    
+    # Notebooks with an unchanged mtime/size reuse their cached result without being read
+    # (with --fix, cached notebooks that have issues are re-checked so they can be fixed in the same task)
+    cached_results = []
+    notebooks_to_check = {}
+    for nb in notebook_files:
+        key = str(nb.relative_to(base_dir))
+        stat = nb.stat()
+        entry = cache.get(key)
+        if entry and args.fix and entry['issues']:
+            notebooks_to_check[str(nb)] = (key, stat, None)
+        elif entry and (entry['mtime_ns'], entry['size']) == (stat.st_mtime_ns, stat.st_size):
+            cached_results.append({'path': str(nb), 'issues': entry['issues'], 'error': None})
+        else:
+            notebooks_to_check[str(nb)] = (key, stat, entry)
+    
+    total_notebooks = len(notebooks_to_check)
+    print(f"🔍 Checking {total_notebooks} notebooks for real build warnings "
+          f"({len(cached_results)} unchanged, using cached results)...")
+    
+    problematic_notebooks = []
+    all_issues = {}
+    errors = {}
+    fix_results = []
+    processed = 0
+    rate = 0
+    start_time = time.time()
+    
+    def report_result(result):
+        if result['issues']:
+            rel_path = Path(result['path']).relative_to(base_dir)
+            print_notebook_issues(len(problematic_notebooks) + 1, rel_path, result['issues'])
+            problematic_notebooks.append(result['path'])
+            all_issues[result['path']] = result['issues']
+            
+        elif result['error']:
+            rel_path = Path(result['path']).relative_to(base_dir)
+            print(f"\n❌ Error checking {rel_path}: {result['error']}")
+            errors[result['path']] = result['error']
+    
+    for result in cached_results:
+        report_result(result)
+    
+    # Use parallel processing for speed
+    max_workers = min(8, os.cpu_count() or 1)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Submit all tasks; a known hash lets workers skip validation for touched-but-unchanged notebooks
+        future_to_notebook = {
+            executor.submit(check_notebook_for_real_warnings, nb_path,
+                            entry['sha256'] if entry else None, args.fix): nb_path
+            for nb_path, (key, stat, entry) in notebooks_to_check.items()
+        }
+        
+        # Process results as they complete
+        for future in as_completed(future_to_notebook):
+            result = future.result()
+            processed += 1
+            
+            # Update the cache (errors are not cached so they are retried next run)
+            key, stat, entry = notebooks_to_check[result['path']]
+            if result.get('cached'):
+                result = {'path': result['path'], 'issues': entry['issues'], 'error': None}
+            if result.get('fixed'):
+                # The notebook was rewritten, so its cached result would be stale
+                cache.pop(key, None)
+            elif result['error'] is None:
+                cache[key] = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha256': result.get('sha256', entry['sha256'] if entry else None),
+                    'issues': result['issues']
+                }
+            
+            # Progress reporting
+            elapsed = time.time() - start_time
+            rate = processed / elapsed if elapsed > 0 else 0
+            eta = (total_notebooks - processed) / rate if rate > 0 else 0
+            
+            current_file = Path(result['path']).name
+            print(f"\r🔍 {processed}/{total_notebooks} ({processed/total_notebooks*100:.1f}%) "
+                  f"| {rate:.1f}/s | ETA: {eta:.0f}s | {current_file[:40]}", 
+                  end='', flush=True)
+            
+            report_result(result)
+            if 'fixed' in result:
+                fix_results.append(result)
+    
+    save_validation_cache(cache)
+    
+    print("\n")  # New line after progress
+    
+    elapsed_total = time.time() - start_time
+    
+    print_issue_summary(all_issues, base_dir, errors)
+    
     print(f"⏱️  Completed in {elapsed_total:.1f}s ({rate:.1f} notebooks/sec)")
     
-    # If --fix argument provided, fix the issues
-    if len(sys.argv) > 1 and sys.argv[1] == "--fix" and problematic_notebooks:
-        print(f"\n🔧 Attempting to fix issues in {len(problematic_notebooks)} notebooks...")
+    # Report fixes applied by the check workers when --fix was provided
+    if args.fix and problematic_notebooks:
+        print(f"\n🔧 Fixed issues in the same pass for {len(problematic_notebooks)} notebooks...")
         
         fixed_count = 0
         total_fixes = 0
         
-        for nb_path in problematic_notebooks:
-            issues = all_issues[nb_path]
-            fix_result = fix_notebook_issues(nb_path, issues)
-            
-            if fix_result['success'] and fix_result['fixed']:
+        for fix_result in sorted(fix_results, key=lambda r: r['path']):
+            if fix_result['fixed']:
                 rel_path = Path(fix_result['path']).relative_to(base_dir)
                 print(f"✅ Fixed {rel_path}: {', '.join(fix_result['fixed'])}")
                 fixed_count += 1
                 total_fixes += len(fix_result['fixed'])
-            elif fix_result['error']:
+            elif fix_result.get('fix_error'):
                 rel_path = Path(fix_result['path']).relative_to(base_dir)
-                print(f"❌ Error fixing {rel_path}: {fix_result['error']}")
+                print(f"❌ Error fixing {rel_path}: {fix_result['fix_error']}")
         
         print(f"\n🎉 Successfully applied {total_fixes} fixes to {fixed_count} notebooks")
         if fixed_count < len(problematic_notebooks):
             print(f"ℹ️  {len(problematic_notebooks) - fixed_count} notebooks had issues that couldn't be automatically fixed")
+    
+    if errors:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
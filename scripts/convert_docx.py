@@ -12,6 +12,7 @@ import zipfile
 import datetime
 import glob
 import argparse
+import json
 from pathlib import Path
 import xml.etree.ElementTree as ET
 from urllib.parse import unquote
@@ -41,8 +42,14 @@ except ImportError:
     print("   or run: pip install -r requirements.txt")
     sys.exit(1)
 
+# Line patterns used by DocxConverter.clean_markdown (compiled once, matched per line)
+HEADING_LINE = re.compile(r'#{1,6}')
+LIST_ITEM_LINE = re.compile(r'\*|\d+\.')
+CODE_FENCE_LINE = re.compile(r'\s*```')
+
 class DocxConverter:
-    def __init__(self, docx_dir="_docx", posts_dir="_posts", images_dir="images/docx"):
+    def __init__(self, docx_dir="_docx", posts_dir="_posts", images_dir="images/docx",
+                 cache_dir=".build_cache"):
         """
         Initialize DocxConverter
         
@@ -50,16 +57,22 @@ class DocxConverter:
             docx_dir: Directory containing DOCX files (supports subdirectories)
             posts_dir: Jekyll posts directory  
             images_dir: Directory for extracted images
+            cache_dir: Directory for build manifests (hidden, so Jekyll ignores it)
         """
         self.base_dir = Path.cwd()
         self.docx_dir = self.base_dir / docx_dir
         self.posts_dir = self.base_dir / posts_dir
         self.images_dir = self.base_dir / images_dir
+        self.cache_dir = self.base_dir / cache_dir
+        
+        # Conversion manifest: one entry per DOCX source, used to build the index page
+        self.manifest_path = self.cache_dir / "docx_manifest.json"
+        self.manifest = self.load_manifest()
         
         # Initialize FrontMatterManager
         if FrontMatterManager:
             try:
-                self.fm_manager = FrontMatterManager(self.docx_dir)
+                self.fm_manager = FrontMatterManager(self.docx_dir, cache_dir=self.cache_dir)
                 # print(f"  FrontMatterManager initialized for {self.docx_dir}")
             except Exception as e:
                 print(f"  ⚠️ FrontMatterManager failed to initialize: {e}")
@@ -169,21 +182,45 @@ class DocxConverter:
         return images_found
 
     def clean_markdown(self, markdown_text):
-        """Clean and format markdown text"""
-        # Remove extra whitespace
-        markdown_text = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown_text)
-        
-        # Fix heading spacing
-        markdown_text = re.sub(r'\n(#{1,6})', r'\n\n\1', markdown_text)
-        markdown_text = re.sub(r'(#{1,6}.*?)\n([^\n#])', r'\1\n\n\2', markdown_text)
+        """
+        Clean and format markdown text
         
-        # Clean up list formatting
-        markdown_text = re.sub(r'\n(\*|\d+\.)', r'\n\n\1', markdown_text)
+        Single linear pass over the lines (no whole-document regex passes):
+        - runs of blank or whitespace-only lines collapse to one blank line
+        - headings get a blank line before and after them
+        - list items (lines starting with * or 1.) get a blank line before them
+        - fenced code blocks are passed through untouched
+        """
+        output = []
+        blank_pending = False
+        after_heading = False
+        in_fence = False
+        
+        for line in markdown_text.split('\n'):
+            if in_fence:
+                output.append(line)
+                if CODE_FENCE_LINE.match(line):
+                    in_fence = False
+                continue
+            
+            # Remove extra whitespace
+            if not line.strip():
+                blank_pending = True
+                continue
+            
+            # Fix heading spacing and list formatting
+            is_heading = HEADING_LINE.match(line) is not None
+            if output and (blank_pending or after_heading or is_heading or LIST_ITEM_LINE.match(line)):
+                output.append('')
+            output.append(line)
+            
+            blank_pending = False
+            after_heading = is_heading
+            if CODE_FENCE_LINE.match(line):
+                in_fence = True
         
         # Remove excessive newlines at start and end
-        markdown_text = markdown_text.strip()
-        
-        return markdown_text
+        return '\n'.join(output).strip()
 
     def extract_tables_from_docx(self, docx_path):
         """Simplified table handling - let mammoth handle table conversion"""
@@ -349,6 +386,11 @@ permalink: {frontmatter_dict.get('permalink', f'/docx/{doc_name}/')}
 ---
 
 """
+                post_meta = {
+                    'title': frontmatter_dict.get('title', doc_name),
+                    'permalink': frontmatter_dict.get('permalink', f'/docx/{doc_name}/'),
+                    'date': frontmatter_dict.get('date', date_time_str),
+                }
                 print(f"  Using enhanced front matter from config")
                 
             except Exception as e:
@@ -369,6 +411,11 @@ permalink: /docx/{doc_name}/
 ---
 
 """
+            post_meta = {
+                'title': doc_name.replace('-', ' ').replace('_', ' ').title(),
+                'permalink': f'/docx/{doc_name}/',
+                'date': f'{date_time_str} +0000',
+            }
             print(f"  Using fallback front matter")
         
         # Add conversion metadata as comments
@@ -395,7 +442,8 @@ permalink: /docx/{doc_name}/
             'docx_path': docx_path,
             'markdown_path': output_path,
             'images': images,
-            'filename': filename
+            'filename': filename,
+            'metadata': post_meta
         }
 
     def convert_all_docx(self, target_dir=None, force_regeneration=False):
@@ -411,6 +459,10 @@ permalink: /docx/{doc_name}/
             print(f"❌ DOCX directory not found: {self.docx_dir}")
             return []
         
+        # Pick up _config.yml edits made since this converter last ran (one stat per config)
+        if self.fm_manager:
+            self.fm_manager.refresh_config_tree()
+        
         # Use recursive glob to find all DOCX files
         if target_dir:
             # Convert relative path to absolute and verify it's within _docx
@@ -430,6 +482,7 @@ permalink: /docx/{doc_name}/
         if not docx_files:
             search_location = target_path if target_dir else self.docx_dir
             print(f"No DOCX files found in {search_location} (including subdirectories)")
+            self.update_manifest([])
             return []
         
         search_location = target_path if target_dir else self.docx_dir
@@ -522,48 +575,150 @@ permalink: /docx/{doc_name}/
                     results.append(result)
                     converted_count += 1
         
+        self.update_manifest(results)
         return results
 
-    def create_index_page(self, results):
-        """Create an index page for all converted documents"""
-        if not results:
-            return
-        
-        index_content = f"""---
-layout: page
-title: "DOCX Documents"
-permalink: /docx/
-description: "Converted documents from DOCX files"
----
-
-# DOCX Documents
-
-This page contains documents converted from DOCX files.
-
-*Last updated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
+    def load_manifest(self):
+        """Load the conversion manifest, or start an empty one if missing/unreadable"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if isinstance(manifest, dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {}
 
-## Available Documents
+    def save_manifest(self):
+        """Write the conversion manifest (atomically) if its content changed"""
+        content = json.dumps(self.manifest, indent=2, sort_keys=True) + "\n"
+        if self.manifest_path.exists() and self.manifest_path.read_text(encoding='utf-8') == content:
+            return False
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, self.manifest_path)
+        return True
 
-"""
+    def read_post_metadata(self, markdown_path):
+        """
+        Recover index metadata from an existing converted post
         
-        # Sort results by filename for consistent ordering
-        sorted_results = sorted(results, key=lambda x: x['docx_path'].name)
+        Only the front matter and the conversion comments at the top of the
+        post are read, so this stays cheap for large documents.
+        """
+        metadata = {}
+        images = 0
+        try:
+            with open(markdown_path, 'r', encoding='utf-8') as f:
+                dashes = 0
+                for line_num, line in enumerate(f):
+                    line = line.rstrip('\n')
+                    if line == '---':
+                        dashes += 1
+                        continue
+                    if dashes == 1:
+                        match = re.match(r'^(title|permalink|date):\s*(.*)$', line)
+                        if match:
+                            metadata[match.group(1)] = match.group(2).strip().strip('"')
+                    elif dashes >= 2:
+                        match = re.match(r'^<!-- Images extracted: (\d+) -->$', line)
+                        if match:
+                            images = int(match.group(1))
+                            break
+                        if line and not line.startswith('<!--'):
+                            break
+        except OSError:
+            return None
+        metadata['images'] = images
+        return metadata
+
+    def update_manifest(self, results):
+        """
+        Record conversion results in the manifest and drop entries whose DOCX is gone
         
-        for result in sorted_results:
-            doc_title = result['docx_path'].stem.replace('-', ' ').replace('_', ' ').title()
-            doc_name = result['docx_path'].stem
-            post_url = f"/docx/{doc_name}/"
+        Converted files replace their entry; skipped files keep the entry from the
+        previous run (or have it recovered from the existing post if missing).
+        """
+        for result in results:
+            try:
+                key = result['docx_path'].relative_to(self.docx_dir).as_posix()
+            except ValueError:
+                key = result['docx_path'].name
             
-            index_content += f"""
-### [{doc_title}]({post_url})
-
-- **Source**: `{result['docx_path'].name}`
-- **Images**: {len(result.get('images') or [])} extracted
-- **Generated**: {datetime.datetime.now().strftime("%Y-%m-%d")}
+            if result.get('skipped'):
+                entry = self.manifest.get(key)
+                if entry and entry.get('filename') == result['filename']:
+                    continue
+                metadata = self.read_post_metadata(result['markdown_path']) or {}
+                images_count = metadata.get('images', 0)
+            else:
+                metadata = result.get('metadata') or {}
+                images_count = len(result.get('images') or [])
+            
+            doc_name = result['docx_path'].stem
+            self.manifest[key] = {
+                'source': result['docx_path'].name,
+                'filename': result['filename'],
+                'title': str(metadata.get('title', doc_name.replace('-', ' ').replace('_', ' ').title())),
+                'permalink': str(metadata.get('permalink', f'/docx/{doc_name}/')),
+                'date': str(metadata.get('date', ''))[:10],
+                'images': images_count,
+            }
+        
+        # Forget documents that were deleted or renamed
+        for key in [k for k in self.manifest if not (self.docx_dir / k).exists()]:
+            del self.manifest[key]
+        
+        self.save_manifest()
 
-"""
+    def create_index_page(self, results=None):
+        """
+        Create an index page for all converted documents
+        
+        The page is built from the conversion manifest rather than the current run's
+        results, so it always lists every document with stable metadata. Output is
+        deterministic and only written when it differs from the existing page, so
+        Jekyll does not regenerate it unless a document was added, removed or changed.
         
-        index_content += f"""
+        Returns:
+            bool: True if docx-index.md was (re)written
+        """
+        index_path = self.base_dir / "docx-index.md"
+        
+        if not self.manifest:
+            return False
+        
+        lines = [
+            "---",
+            "layout: page",
+            'title: "DOCX Documents"',
+            "permalink: /docx/",
+            'description: "Converted documents from DOCX files"',
+            "---",
+            "",
+            "# DOCX Documents",
+            "",
+            "This page contains documents converted from DOCX files.",
+            "",
+            "## Available Documents",
+            "",
+        ]
+        
+        # Sort by source path for consistent ordering
+        for key in sorted(self.manifest):
+            entry = self.manifest[key]
+            lines.extend([
+                "",
+                f"### [{entry['title']}]({entry['permalink']})",
+                "",
+                f"- **Source**: `{entry['source']}`",
+                f"- **Images**: {entry['images']} extracted",
+                f"- **Date**: {entry['date']}",
+                "",
+            ])
+        
+        lines.append("""
 ## Image Gallery
 
 All extracted images are available in the [images/docx](/images/docx/) directory.
@@ -579,12 +734,16 @@ These documents were automatically converted from DOCX format using a two-step p
 ---
 
 *Note: Original DOCX files are maintained in the `_docx` directory and excluded from the published site.*
-"""
+""")
+        index_content = "\n".join(lines)
+        
+        # Skip the write (and the Jekyll regeneration it would trigger) if nothing changed
+        if index_path.exists() and index_path.read_text(encoding='utf-8') == index_content:
+            return False
         
-        # Write index page
-        index_path = self.base_dir / "docx-index.md"
         with open(index_path, 'w', encoding='utf-8') as index_file:
             index_file.write(index_content)
+        return True
 
 def main():
     parser = argparse.ArgumentParser(description='Convert DOCX files to Jekyll markdown')
@@ -623,10 +782,13 @@ def main():
     # Only count files that were actually converted (not skipped)
     converted_files = [r for r in results if not r.get('skipped', False)]
     
+    # Index is rebuilt from the manifest and only rewritten when its content changes
+    if converter.create_index_page():
+        print("Updated: docx-index.md")
+    
     if converted_files:
-        converter.create_index_page(results)
         print(f"Converted: {len(converted_files)} documents")
-        print(f"Images: {sum(len(r.get('images', [])) for r in converted_files)} extracted")
+        print(f"Images: {sum(len(r.get('images') or []) for r in converted_files)} extracted")
     elif not results:
         # Only show this if no DOCX files exist at all
         if not converter.docx_dir.exists() or not list(converter.docx_dir.glob("*.docx")):
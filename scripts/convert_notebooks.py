@@ -8,16 +8,26 @@ import sys
 import subprocess
 from hashlib import sha256
 import concurrent.futures, traceback, re
+import argparse
+import warnings
 
 if __name__ == "__main__":
     from progress_bar import ProgressBar
+    from frontmatter_manager import FrontMatterManager
+    from check_conversion_warnings import collect_notebook_issues, print_notebook_issues, print_issue_summary
 else:
     from scripts.progress_bar import ProgressBar
+    from scripts.frontmatter_manager import FrontMatterManager
+    from scripts.check_conversion_warnings import collect_notebook_issues, print_notebook_issues, print_issue_summary
 
 
 notebook_directory = "_notebooks"
 destination_directory = "_posts"
 mermaid_output_directory = "assets/mermaid"
+cache_directory = ".build_cache"
+
+# One FrontMatterManager per process; workers load the resolved _config.yml tree from the shared disk cache
+_frontmatter_manager = None
 
 # Comment patterns for different languages
 CODE_RUNNER_PATTERNS = {
@@ -49,6 +59,21 @@ def extract_front_matter(notebook_file, cell):
     return front_matter
 
 
+def get_frontmatter_manager():
+    global _frontmatter_manager
+    if _frontmatter_manager is None:
+        _frontmatter_manager = FrontMatterManager(notebook_directory, cache_dir=cache_directory)
+    return _frontmatter_manager
+
+
+def apply_directory_config(notebook_file, front_matter):
+    """Merge _config.yml defaults under the notebook's own front matter (notebook keys win)"""
+    metadata = get_frontmatter_manager().get_file_metadata(notebook_file)
+    if not metadata:
+        return front_matter
+    return {**metadata, **front_matter}
+
+
 def get_relative_output_path(notebook_file):
     relative_path = os.path.relpath(notebook_file, notebook_directory)
 
@@ -292,10 +317,20 @@ def inject_code_runners(markdown, notebook, front_matter=None):
 
 
 # Function to convert the notebook to Markdown with front matter
-def convert_notebook_to_markdown_with_front_matter(notebook_file):
+# With validate=True, returns the check_conversion_warnings issues for the notebook as loaded
+def convert_notebook_to_markdown_with_front_matter(notebook_file, validate=False):
+    issues = None
     with open(notebook_file, "r", encoding="utf-8") as file:
-        notebook = nbformat.read(file, as_version=nbformat.NO_CONVERT)
+        if validate:
+            with warnings.catch_warnings(record=True) as read_warnings:
+                warnings.simplefilter("always")
+                notebook = nbformat.read(file, as_version=nbformat.NO_CONVERT)
+            # Validate before the front matter cell is popped and code-runner cells are rewritten
+            issues = collect_notebook_issues(notebook, read_warnings)
+        else:
+            notebook = nbformat.read(file, as_version=nbformat.NO_CONVERT)
         front_matter = extract_front_matter(notebook_file, notebook.cells[0])
+        front_matter = apply_directory_config(notebook_file, front_matter)
         
         # Get permalink for runner_id generation
         permalink = front_matter.get('permalink', '')
@@ -313,62 +348,95 @@ def convert_notebook_to_markdown_with_front_matter(notebook_file):
         # Inject code-runner includes (and submit buttons if challenge_submit is enabled)
         markdown = inject_code_runners(markdown, notebook, front_matter)
         
+        # Dump as YAML so values containing ': ', ' #' or newlines stay valid front matter
         front_matter_content = (
             "---\n"
-            + "\n".join(f"{key}: {value}" for key, value in front_matter.items())
-            + "\n---\n\n"
+            + yaml.safe_dump(front_matter, default_flow_style=False, sort_keys=False, allow_unicode=True)
+            + "---\n\n"
         )
         markdown_with_front_matter = front_matter_content + markdown
         destination_path = get_relative_output_path(notebook_file)
         ensure_directory_exists(destination_path)
         with open(destination_path, "w", encoding="utf-8") as file:
             file.write(markdown_with_front_matter)
+    return issues
 
 
 # Function to convert the Jupyter Notebook files to Markdown
-def convert_single_notebook(notebook_file):
+def convert_single_notebook(notebook_file, validate=False):
     try:
-        convert_notebook_to_markdown_with_front_matter(notebook_file)
+        return convert_notebook_to_markdown_with_front_matter(notebook_file, validate)
     except ConversionException as e:
         print(f"Conversion error for {notebook_file}: {str(e)}")
         error_cleanup(notebook_file)
         sys.exit(1)
 
 
-def process_notebook(notebook_file):
+def process_notebook(notebook_file, validate=False):
+    result = {'path': notebook_file, 'issues': [], 'error': None}
     try:
-        convert_single_notebook(notebook_file)
+        result['issues'] = convert_single_notebook(notebook_file, validate) or []
     except ConversionException as e:
         print(f"Conversion error for {notebook_file}: {str(e)}")
         error_cleanup(notebook_file)
+        result['error'] = str(e)
     except Exception as e:
         print(f"Unexpected error for {notebook_file}: {traceback.format_exc()}")
+        result['error'] = str(e)
+    return result
 
 
-def convert_notebooks():
+def report_validation(results):
+    """
+    Print --validate results in the same format as check_conversion_warnings.py
+    
+    Returns the number of notebooks that failed to convert.
+    """
+    all_issues = {}
+    errors = {}
+    for result in sorted(results, key=lambda r: r['path']):
+        rel_path = os.path.relpath(result['path'])
+        if result['issues']:
+            print_notebook_issues(len(all_issues) + 1, rel_path, result['issues'])
+            all_issues[result['path']] = result['issues']
+        elif result['error']:
+            print(f"\n❌ Error converting {rel_path}: {result['error']}")
+            errors[result['path']] = result['error']
+    print()
+    print_issue_summary(all_issues, os.getcwd(), errors)
+    return len(errors)
+
+
+def convert_notebooks(validate=False):
     maxCores = os.cpu_count()  # get the number of cores available on the system
 
     notebook_files = glob.glob(f"{notebook_directory}/**/*.ipynb", recursive=True)
 
+    # Resolve (and cache to disk) the _config.yml tree before workers start,
+    # rebuilding it if any config changed since an earlier batch in this process
+    get_frontmatter_manager().refresh_config_tree()
+
     # create progress bar
     convertBar = ProgressBar(
         userInfo="Notebook conversion progress:", total=(len(notebook_files))
     )
 
+    results = []
     with concurrent.futures.ProcessPoolExecutor(max_workers=maxCores) as executor:
         futures = {
-            executor.submit(process_notebook, notebook_file): notebook_file
+            executor.submit(process_notebook, notebook_file, validate): notebook_file
             for notebook_file in notebook_files
         }
 
         for future in concurrent.futures.as_completed(futures):
             notebook_file = futures[future]
             try:
-                future.result()
+                results.append(future.result())
             except Exception as e:
                 print(
                     f"Error occurred during notebook processing: {notebook_file}\n{traceback.format_exc()}"
                 )
+                results.append({'path': notebook_file, 'issues': [], 'error': str(e)})
             finally:
                 rel_path = os.path.relpath(notebook_file, notebook_directory)
                 convertBar.set_suffix(rel_path)
@@ -376,6 +444,10 @@ def convert_notebooks():
 
     convertBar.end_progress()
 
+    if validate:
+        return report_validation(results)
+    return 0
+
 
 # MERMAID STUFF =========
 def ensure_directory_exists(path):
@@ -413,14 +485,24 @@ def process_mermaid_cells(notebook):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert Jupyter notebooks to Jekyll posts')
+    parser.add_argument('notebook_file', nargs='?',
+                        help='Convert only this notebook')
+    parser.add_argument('--validate', action='store_true',
+                        help='Report nbformat warnings and Unicode issues found while converting')
+    args = parser.parse_args()
+
     # Check if a specific file was passed as an argument
-    if len(sys.argv) > 1:
-        notebook_file = sys.argv[1]
+    if args.notebook_file:
+        notebook_file = args.notebook_file
         if os.path.exists(notebook_file):
             print(f"Converting single notebook: {notebook_file}")
-            convert_single_notebook(notebook_file)
+            issues = convert_single_notebook(notebook_file, args.validate)
+            if args.validate and report_validation([{'path': notebook_file, 'issues': issues or [], 'error': None}]):
+                sys.exit(1)
         else:
             print(f"Error: File not found: {notebook_file}")
             sys.exit(1)
-    else:
-        convert_notebooks()
+    elif convert_notebooks(validate=args.validate):
+        # Only --validate reports failures; exit non-zero like check_conversion_warnings.py
+        sys.exit(1)
@@ -6,24 +6,89 @@ For use with the pages repository - maps colors from local styling only
 """
 
 import re
+import colorsys
+import heapq
 from pathlib import Path
 from collections import defaultdict
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NEWLINE = re.compile(r'\n')
+COLOR_FUNCTION = re.compile(r'(rgb|hsl)a?\((.*)\)$')
+COLOR_ARGUMENT_SEPARATOR = re.compile(r'[\s,/]+')
+
+# RGB values of the named colors matched by the scanner
+NAMED_COLOR_RGB = {
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+    'red': (255, 0, 0),
+    'green': (0, 128, 0),
+    'blue': (0, 0, 255),
+    'yellow': (255, 255, 0),
+    'orange': (255, 165, 0),
+    'purple': (128, 0, 128),
+    'pink': (255, 192, 203),
+    'gray': (128, 128, 128),
+    'grey': (128, 128, 128),
+}
+
+# sRGB -> CIE XYZ (D65) conversion, used for Lab distances when merging colors
+SRGB_TO_XYZ = [
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+]
+D65_WHITE = [0.95047, 1.0, 1.08883]
+
+# Keywords that classify what a color is used for, checked in order
+COLOR_CONTEXTS = {
+    'background': ['background', 'bg-', 'bg:'],
+    'text': ['color:', 'text-', 'font-color'],
+    'border': ['border'],
+    'hover': [':hover', 'hover-', 'hover:'],
+    'active': [':active', 'active-'],
+    'focus': [':focus', 'focus-'],
+    'disabled': ['disabled', ':disabled'],
+    'error': ['error', 'danger', 'invalid'],
+    'success': ['success', 'valid', 'ok', 'correct'],
+    'warning': ['warning', 'warn', 'caution'],
+    'info': ['info', 'primary'],
+    'shadow': ['shadow', 'box-shadow'],
+    'gradient': ['gradient'],
+    'link': ['link', 'anchor'],
+}
+
 class LocalColorMapper:
-    def __init__(self, scss_dir='_sass'):
+    def __init__(self, scss_dir='_sass', merge_threshold=2.3):
         self.scss_dir = Path(scss_dir)
+        self.merge_threshold = merge_threshold  # max ΔE for merging near-duplicate colors (0 disables)
+        self.color_merges = defaultdict(list)  # canonical color -> [(merged color, ΔE)]
         self.colors = defaultdict(list)  # color value -> list of usages
         self.existing_vars = {}  # existing variable -> value
+        self.existing_values = {}  # normalized value -> first existing variable with that value
         self.component_colors = defaultdict(lambda: defaultdict(set))  # component -> context -> colors
         
-        # Color patterns to match
+        # Color patterns to match (none of them span lines)
         self.color_patterns = {
             'hex': r'#[0-9a-fA-F]{3,8}\b',
-            'rgb': r'rgba?\([^)]+\)',
-            'hsl': r'hsla?\([^)]+\)',
-            'named': r'\b(black|white|red|green|blue|yellow|orange|purple|pink|gray|grey|transparent|inherit)\b'
+            'rgb': r'rgba?\([^)\n]+\)',
+            'hsl': r'hsla?\([^)\n]+\)',
+            'named': r'\b(?:black|white|red|green|blue|yellow|orange|purple|pink|gray|grey|transparent|inherit)\b'
         }
+        
+        # All patterns in one scanner, plus one for hex/named colors nested in a
+        # matched rgb()/hsl() call (e.g. #fff in rgba(#fff, .5))
+        self.color_scanner = re.compile('|'.join(
+            f'(?P<{pattern_type}>{pattern})' for pattern_type, pattern in self.color_patterns.items()
+        ))
+        self.nested_color_scanner = re.compile('|'.join(
+            f'(?P<{pattern_type}>{self.color_patterns[pattern_type]})' for pattern_type in ('hex', 'named')
+        ))
+        self.normalized_colors = {}  # original color -> normalized color
     
     def extract_existing_variables(self):
         """Extract already defined SCSS variables from colors.scss and user-colors.scss"""
@@ -48,6 +113,11 @@ class LocalColorMapper:
                 print(f"   Found {vars_in_file} variables in this file")
                 total_vars += vars_in_file
         
+        # Index variables by normalized value once, so color lookups don't scan every variable
+        self.existing_values = {}
+        for var_name, value in self.existing_vars.items():
+            self.existing_values.setdefault(self.normalize_color(value), var_name)
+        
         print(f"✅ Total existing color variables: {total_vars}")
     
     def normalize_color(self, color):
@@ -81,29 +151,21 @@ class LocalColorMapper:
         """Determine what the color is used for based on context"""
         line_lower = line.lower()
         
-        contexts = {
-            'background': ['background', 'bg-', 'bg:'],
-            'text': ['color:', 'text-', 'font-color'],
-            'border': ['border'],
-            'hover': [':hover', 'hover-', 'hover:'],
-            'active': [':active', 'active-'],
-            'focus': [':focus', 'focus-'],
-            'disabled': ['disabled', ':disabled'],
-            'error': ['error', 'danger', 'invalid'],
-            'success': ['success', 'valid', 'ok', 'correct'],
-            'warning': ['warning', 'warn', 'caution'],
-            'info': ['info', 'primary'],
-            'shadow': ['shadow', 'box-shadow'],
-            'gradient': ['gradient'],
-            'link': ['link', 'anchor'],
-        }
-        
-        for context, keywords in contexts.items():
+        for context, keywords in COLOR_CONTEXTS.items():
             if any(kw in line_lower for kw in keywords):
                 return context
         
         return 'general'
     
+    def find_colors(self, content):
+        """Yield (offset, color) for every color match in content, in order"""
+        for match in self.color_scanner.finditer(content):
+            yield match.start(), match.group()
+            if match.lastgroup in ('rgb', 'hsl'):
+                start = match.start()
+                for nested in self.nested_color_scanner.finditer(content, start + 1, match.end()):
+                    yield nested.start(), nested.group()
+    
     def scan_scss_files(self):
         """Scan all local SCSS files for color values"""
         print("\n🔍 Scanning local SCSS files for colors...")
@@ -121,39 +183,55 @@ class LocalColorMapper:
             
             try:
                 content = scss_file.read_text()
-                lines = content.split('\n')
                 
-                for line_num, line in enumerate(lines, 1):
-                    # Skip comments
-                    if line.strip().startswith('//') or line.strip().startswith('/*'):
+                # Offsets where each line starts, to map match offsets to line numbers
+                line_starts = [0]
+                line_starts.extend(match.end() for match in NEWLINE.finditer(content))
+                line_index = 0
+                
+                # Per-line context, or None for comment lines; computed once per line
+                line_contexts = {}
+                
+                for start, color in self.find_colors(content):
+                    # Matches come in order, so the line index only moves forward
+                    while line_index + 1 < len(line_starts) and line_starts[line_index + 1] <= start:
+                        line_index += 1
+                    line_num = line_index + 1
+                    
+                    if line_num not in line_contexts:
+                        line_end = line_starts[line_index + 1] - 1 if line_index + 1 < len(line_starts) else len(content)
+                        line = content[line_starts[line_index]:line_end]
+                        # Skip comments
+                        if line.strip().startswith('//') or line.strip().startswith('/*'):
+                            line_contexts[line_num] = None
+                        else:
+                            line_contexts[line_num] = self.get_color_context(line, color)
+                    context = line_contexts[line_num]
+                    if context is None:
+                        continue
+                    
+                    # Skip if it's already a variable reference
+                    if color.startswith('$'):
                         continue
                     
-                    # Find all colors in this line
-                    for pattern_type, pattern in self.color_patterns.items():
-                        for match in re.finditer(pattern, line):
-                            color = match.group(0)
-                            
-                            # Skip if it's already a variable reference
-                            if color.startswith('$'):
-                                continue
-                            
-                            # Skip CSS keywords that aren't really colors
-                            if color in ['inherit', 'transparent']:
-                                continue
-                            
-                            normalized_color = self.normalize_color(color)
-                            context = self.get_color_context(line, color)
-                            
-                            self.colors[normalized_color].append({
-                                'file': str(relative_path),
-                                'line': line_num,
-                                'original': color,
-                                'context': context,
-                                'component': component
-                            })
-                            
-                            # Track by component
-                            self.component_colors[component][context].add(normalized_color)
+                    # Skip CSS keywords that aren't really colors
+                    if color in ['inherit', 'transparent']:
+                        continue
+                    
+                    normalized_color = self.normalized_colors.get(color)
+                    if normalized_color is None:
+                        normalized_color = self.normalized_colors[color] = self.normalize_color(color)
+                    
+                    self.colors[normalized_color].append({
+                        'file': str(relative_path),
+                        'line': line_num,
+                        'original': color,
+                        'context': context,
+                        'component': component
+                    })
+                    
+                    # Track by component
+                    self.component_colors[component][context].add(normalized_color)
             
             except Exception as e:
                 print(f"  ⚠️ Error reading {relative_path}: {e}")
@@ -163,9 +241,8 @@ class LocalColorMapper:
     def generate_variable_name(self, color, component, context, usage_count):
         """Generate semantic variable name for a color"""
         # Check if this color matches an existing variable value
-        for var_name, var_value in self.existing_vars.items():
-            if self.normalize_color(var_value) == color:
-                return var_name
+        if color in self.existing_values:
+            return self.existing_values[color]
         
         # Generate new variable name
         # Clean component name
@@ -222,11 +299,125 @@ class LocalColorMapper:
         
         return None
     
+    def parse_color(self, color):
+        """Parse a hex, rgb(a), hsl(a) or named color into (r, g, b, alpha) with r/g/b in 0-255"""
+        color = color.strip().lower()
+        if color in NAMED_COLOR_RGB:
+            return (*NAMED_COLOR_RGB[color], 1.0)
+        
+        if color.startswith('#'):
+            hex_color = color[1:]
+            if len(hex_color) in (3, 4):
+                hex_color = ''.join([c*2 for c in hex_color])
+            if len(hex_color) not in (6, 8):
+                return None
+            try:
+                values = [int(hex_color[i:i + 2], 16) for i in range(0, len(hex_color), 2)]
+            except ValueError:
+                return None
+            alpha = values[3] / 255 if len(values) == 4 else 1.0
+            return (values[0], values[1], values[2], round(alpha, 3))
+        
+        match = COLOR_FUNCTION.match(color)
+        if not match:
+            return None
+        args = [arg for arg in COLOR_ARGUMENT_SEPARATOR.split(match.group(2).strip()) if arg]
+        
+        try:
+            # SCSS rgba(#fff, .5) / rgba(white, .5)
+            if len(args) == 2:
+                base = self.parse_color(args[0])
+                if base is None:
+                    return None
+                return (*base[:3], round(self.parse_alpha(args[1]), 3))
+            
+            if match.group(1) == 'rgb':
+                rgb = [float(arg[:-1]) * 2.55 if arg.endswith('%') else float(arg) for arg in args[:3]]
+            else:
+                hue = float(args[0].replace('deg', '')) % 360 / 360
+                saturation = float(args[1].rstrip('%')) / 100
+                lightness = float(args[2].rstrip('%')) / 100
+                rgb = [channel * 255 for channel in colorsys.hls_to_rgb(hue, lightness, saturation)]
+            alpha = self.parse_alpha(args[3]) if len(args) > 3 else 1.0
+        except (ValueError, IndexError):
+            return None
+        
+        return (*rgb, round(alpha, 3))
+    
+    def parse_alpha(self, value):
+        """Parse an alpha value like 0.5, .5 or 50%"""
+        return float(value[:-1]) / 100 if value.endswith('%') else float(value)
+    
+    def rgb_to_lab(self, rgb):
+        """Convert an (n, 3) array of sRGB values (0-255) to CIE Lab (D65)"""
+        rgb = np.clip(rgb, 0, 255) / 255
+        linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+        xyz = linear @ np.asarray(SRGB_TO_XYZ).T / np.asarray(D65_WHITE)
+        f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+        return np.column_stack([
+            116 * f[:, 1] - 16,
+            500 * (f[:, 0] - f[:, 1]),
+            200 * (f[:, 1] - f[:, 2]),
+        ])
+    
+    def merge_similar_colors(self):
+        """Merge perceptually near-duplicate colors into one canonical color
+        
+        Colors are converted to Lab space and clustered greedily: each canonical
+        color (existing variable values first, then the most used) absorbs every
+        unclustered color with the same alpha within merge_threshold ΔE (CIE76).
+        Merged colors' usages move to the canonical color and the merges are
+        recorded in color_merges for the usage report.
+        """
+        if self.merge_threshold <= 0:
+            return
+        if np is None:
+            print("  ⚠️ numpy not available, skipping near-duplicate color merging")
+            return
+        
+        parsed = [(color, self.parse_color(usages[0]['original'])) for color, usages in self.colors.items()]
+        parsed = [(color, value) for color, value in parsed if value is not None]
+        if len(parsed) < 2:
+            return
+        
+        colors = [color for color, _ in parsed]
+        values = np.array([value for _, value in parsed], dtype=float)
+        lab = self.rgb_to_lab(values[:, :3])
+        alpha = values[:, 3]
+        
+        order = sorted(range(len(colors)), key=lambda i: (
+            colors[i] not in self.existing_values, -len(self.colors[colors[i]]), colors[i]))
+        cluster = np.full(len(colors), -1)
+        
+        for i in order:
+            if cluster[i] >= 0:
+                continue
+            delta_e = np.sqrt(((lab - lab[i]) ** 2).sum(axis=1))
+            members = np.flatnonzero((cluster < 0) & (alpha == alpha[i]) & (delta_e <= self.merge_threshold))
+            cluster[members] = i
+            for j in members:
+                if j != i:
+                    self.color_merges[colors[i]].append((colors[j], float(delta_e[j])))
+        
+        # Move merged usages to their canonical color
+        canonical_of = {}
+        for canonical, merged in self.color_merges.items():
+            for color, _ in merged:
+                self.colors[canonical].extend(self.colors.pop(color))
+                canonical_of[color] = canonical
+        
+        for contexts in self.component_colors.values():
+            for context, context_colors in contexts.items():
+                contexts[context] = {canonical_of.get(color, color) for color in context_colors}
+        
+        print(f"✅ Merged {len(canonical_of)} near-duplicate colors into "
+              f"{len(self.color_merges)} canonical colors (ΔE ≤ {self.merge_threshold})")
+    
     def generate_color_map(self):
         """Generate the root color map"""
         print("\n📝 Generating unified color map...")
         
-        output = """// AUTO-GENERATED ROOT COLOR MAP FOR LOCAL STYLING
+        output = ["""// AUTO-GENERATED ROOT COLOR MAP FOR LOCAL STYLING
 // This file contains all color variables used across the local repository
 // Generated by scripts/create_local_color_map.py
 //
@@ -236,21 +427,21 @@ class LocalColorMapper:
 // EXISTING COLOR VARIABLES (from colors.scss and user-colors.scss)
 // =============================================================================
 
-"""
+"""]
         
         # First, list existing variables
         if self.existing_vars:
             for var_name, value in sorted(self.existing_vars.items()):
-                output += f"{var_name}: {value};\n"
+                output.append(f"{var_name}: {value};\n")
         else:
-            output += "// No existing variables found\n"
+            output.append("// No existing variables found\n")
         
-        output += """
+        output.append("""
 // =============================================================================
 // COMPONENT-SPECIFIC COLORS (extracted from all SCSS files)
 // =============================================================================
 
-"""
+""")
         
         # Group colors by component
         component_vars = defaultdict(list)
@@ -262,13 +453,7 @@ class LocalColorMapper:
                 continue
             
             # Check if this color is already defined in existing vars
-            already_defined = False
-            for var_name, var_value in self.existing_vars.items():
-                if self.normalize_color(var_value) == color:
-                    already_defined = True
-                    break
-            
-            if already_defined:
+            if color in self.existing_values:
                 continue
                 
             seen_colors.add(color)
@@ -278,12 +463,20 @@ class LocalColorMapper:
             component = primary_usage['component']
             context = primary_usage['context']
             
+            # Count usages in the primary component and collect files in one pass
+            component_usages = 0
+            files = set()
+            for usage in usages:
+                if usage['component'] == component:
+                    component_usages += 1
+                files.add(usage['file'])
+            
             # Generate variable name
             var_name = self.generate_variable_name(
                 color, 
                 component, 
                 context, 
-                len([u for u in usages if u['component'] == component])
+                component_usages
             )
             
             # Track the variable
@@ -292,26 +485,26 @@ class LocalColorMapper:
                 'value': primary_usage['original'],
                 'context': context,
                 'usages': len(usages),
-                'files': set(u['file'] for u in usages)
+                'files': files
             })
         
         # Write component sections
         for component in sorted(component_vars.keys()):
-            output += f"// {component.upper().replace('-', ' ')}\n"
-            output += f"// {'-' * 77}\n\n"
+            output.append(f"// {component.upper().replace('-', ' ')}\n")
+            output.append(f"// {'-' * 77}\n\n")
             
             for var_info in sorted(component_vars[component], key=lambda x: (x['context'], x['var_name'])):
-                output += f"{var_info['var_name']}: {var_info['value']};\n"
-                output += f"// Context: {var_info['context']}\n"
-                output += f"// Used {var_info['usages']} time(s) in {len(var_info['files'])} file(s)\n"
-                output += f"// Files: {', '.join(sorted(list(var_info['files'])[:3]))}\n\n"
+                output.append(f"{var_info['var_name']}: {var_info['value']};\n")
+                output.append(f"// Context: {var_info['context']}\n")
+                output.append(f"// Used {var_info['usages']} time(s) in {len(var_info['files'])} file(s)\n")
+                output.append(f"// Files: {', '.join(sorted(list(var_info['files'])[:3]))}\n\n")
         
-        output += """// =============================================================================
+        output.append("""// =============================================================================
 // CSS CUSTOM PROPERTIES (for JavaScript/dynamic access)
 // =============================================================================
 
 :root {
-"""
+""")
         
         # Create CSS custom properties for all variables
         all_vars = list(self.existing_vars.keys())
@@ -321,51 +514,66 @@ class LocalColorMapper:
         
         for var_name in sorted(set(all_vars)):
             css_name = var_name.replace('$', '--').replace('_', '-')
-            output += f"  {css_name}: #{{{var_name}}};\n"
+            output.append(f"  {css_name}: #{{{var_name}}};\n")
         
-        output += "}\n"
+        output.append("}\n")
         
-        return output
+        return ''.join(output)
     
     def create_usage_report(self):
         """Create a detailed report of color usage"""
-        report = "# Local Color Usage Report\n\n"
+        report = ["# Local Color Usage Report\n\n"]
         
-        report += f"## Summary\n\n"
-        report += f"- Total unique colors found: {len(self.colors)}\n"
-        report += f"- Existing variables: {len(self.existing_vars)}\n"
-        report += f"- Components with colors: {len(self.component_colors)}\n\n"
+        report.append(f"## Summary\n\n")
+        report.append(f"- Total unique colors found: {len(self.colors)}\n")
+        report.append(f"- Existing variables: {len(self.existing_vars)}\n")
+        report.append(f"- Components with colors: {len(self.component_colors)}\n")
+        report.append(f"- Near-duplicate colors merged: {sum(len(m) for m in self.color_merges.values())}\n\n")
         
-        report += "## Colors by Component\n\n"
+        report.append("## Colors by Component\n\n")
         
         for component in sorted(self.component_colors.keys()):
             contexts = self.component_colors[component]
             total_colors = sum(len(colors) for colors in contexts.values())
             
-            report += f"### {component} ({total_colors} unique colors)\n\n"
+            report.append(f"### {component} ({total_colors} unique colors)\n\n")
             
             for context in sorted(contexts.keys()):
                 colors = contexts[context]
-                report += f"- **{context}**: {len(colors)} colors\n"
+                report.append(f"- **{context}**: {len(colors)} colors\n")
             
-            report += "\n"
+            report.append("\n")
         
-        report += "## Most Used Colors\n\n"
+        report.append("## Most Used Colors\n\n")
         
-        sorted_colors = sorted(self.colors.items(), key=lambda x: len(x[1]), reverse=True)
+        # Same order as a stable sort by usage count (most used first), without sorting every color
+        most_used = heapq.nlargest(30, self.colors.items(), key=lambda x: len(x[1]))
         
-        for color, usages in sorted_colors[:30]:
-            report += f"### `{usages[0]['original']}` ({len(usages)} usages)\n\n"
-            components = set(u['component'] for u in usages)
-            report += f"**Components**: {', '.join(sorted(components))}\n\n"
-            contexts = set(u['context'] for u in usages)
-            report += f"**Contexts**: {', '.join(sorted(contexts))}\n\n"
+        for color, usages in most_used:
+            # Collect components, contexts and files in one pass over the usages
+            components, contexts, files = set(), set(), set()
+            for usage in usages:
+                components.add(usage['component'])
+                contexts.add(usage['context'])
+                files.add(usage['file'])
+            
+            report.append(f"### `{usages[0]['original']}` ({len(usages)} usages)\n\n")
+            report.append(f"**Components**: {', '.join(sorted(components))}\n\n")
+            report.append(f"**Contexts**: {', '.join(sorted(contexts))}\n\n")
             
             # Show first few file locations
-            files = sorted(set(u['file'] for u in usages))[:5]
-            report += f"**Files**: {', '.join(files)}\n\n"
+            report.append(f"**Files**: {', '.join(sorted(files)[:5])}\n\n")
+        
+        if self.color_merges:
+            report.append("## Merged Near-Duplicate Colors\n\n")
+            
+            for canonical in sorted(self.color_merges.keys()):
+                merged = sorted(self.color_merges[canonical])
+                report.append(f"- `{canonical}` ← {', '.join(f'`{color}` (ΔE {delta_e:.1f})' for color, delta_e in merged)}\n")
+            
+            report.append("\n")
         
-        return report
+        return ''.join(report)
     
     def run(self, output_file='_sass/root-color-map.scss'):
         """Run the full color extraction and map generation"""
@@ -379,6 +587,7 @@ class LocalColorMapper:
         # Step 2: Scan all SCSS files
         print("\n🔍 Step 2: Scanning all local SCSS files...")
         self.scan_scss_files()
+        self.merge_similar_colors()
         
         # Step 3: Generate the color map
         print("\n📝 Step 3: Generating color map...")
@@ -7,80 +7,219 @@ Handles intelligent front matter generation with Jekyll-native YAML configuratio
 import os
 from pathlib import Path
 import datetime
+import hashlib
+import json
+import threading
 import yaml
 import re
 
+CONFIG_FILENAME = "_config.yml"
+CACHE_VERSION = 2
+
+def _encode_cache_value(value):
+    """json.dumps default: tag YAML dates/timestamps so the cache restores their types"""
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+def _decode_cache_value(obj):
+    """json.loads object_hook reversing _encode_cache_value"""
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return datetime.date.fromisoformat(obj['__date__'])
+    return obj
+
 class FrontMatterManager:
-    def __init__(self, source_dir):
+    def __init__(self, source_dir, cache_dir=None):
         """
         Initialize FrontMatterManager
         
         Args:
             source_dir: Path to source directory (e.g., _docx, _notebooks, _md)
+            cache_dir: Optional directory for the on-disk config cache, shared by
+                       every process (and run) that resolves the same source_dir
         """
-        self.source_dir = Path(source_dir)
-        self.config_cache = {}
-        self.config_timestamps = {}  # Track file modification times
+        self.source_dir = Path(os.path.abspath(source_dir))
+        self.config_tree = None  # directory -> resolved (inherited) config
+        self.config_files = {}  # config file path -> {mtime_ns, size, sha256, config}
+        self._tree_lock = threading.Lock()
         
-    def load_directory_config(self, directory_path):
-        """Load Jekyll-style YAML configuration for a specific directory"""
-        # Check if cached config is still valid
-        cache_key = str(directory_path)
-        
-        # Collect all config files that could affect this directory
-        config_files = []
-        current = directory_path
-        while current != current.parent and current.parts:
-            if '_docx' in current.parts:  # Only look within _docx
-                config_file = current / "_config.yml"
-                if config_file.exists():
-                    config_files.append(config_file)
-            current = current.parent
-            if current == self.source_dir:
-                break
-        
-        # Check if any config file has been modified since last cache
-        cache_valid = cache_key in self.config_cache
-        if cache_valid:
-            for config_file in config_files:
-                file_mtime = config_file.stat().st_mtime
-                cached_mtime = self.config_timestamps.get(str(config_file), 0)
-                if file_mtime > cached_mtime:
-                    cache_valid = False
-                    break
-        
-        if cache_valid:
-            return self.config_cache[cache_key]
-            
-        # Cache is invalid or doesn't exist, reload config
-        config = {}
-        
-        # Update timestamps for all config files
-        for config_file in config_files:
-            self.config_timestamps[str(config_file)] = config_file.stat().st_mtime
-        
-        # Try to load _config.yml from current directory
-        config_file = directory_path / "_config.yml"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                dir_config = yaml.safe_load(f) or {}
-                config.update(dir_config)
-        
-        # Try to load from parent directories up to source_dir
-        current = directory_path
-        while current != self.source_dir and current != current.parent:
-            parent_config = current.parent / "_config.yml"
-            if parent_config.exists():
-                with open(parent_config, 'r') as f:
-                    parent_cfg = yaml.safe_load(f) or {}
-                    # Merge parent config (parent values as defaults)
-                    # Child configs override parent configs
-                    for key, value in parent_cfg.items():
-                        if key not in config:
-                            config[key] = value
+        self.cache_path = None
+        self._disk_tree = None
+        if cache_dir is not None:
+            cache_name = self.source_dir.name.lstrip('_') or 'root'
+            self.cache_path = Path(cache_dir) / f"frontmatter_{cache_name}.json"
+            self._load_disk_cache()
+        
+    def _relative_key(self, path):
+        """Cache key for a path under source_dir"""
+        return Path(os.path.relpath(path, self.source_dir)).as_posix()
+        
+    def _load_disk_cache(self):
+        """Seed config_files (and the resolved tree) from the on-disk cache, if valid"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f, object_hook=_decode_cache_value)
+        except (OSError, ValueError):
+            return
+        if cache.get('version') != CACHE_VERSION or cache.get('source_dir') != str(self.source_dir):
+            return
+        for rel_path, entry in cache.get('files', {}).items():
+            self.config_files[os.path.join(self.source_dir, rel_path)] = entry
+        self._disk_tree = {
+            self.source_dir / rel_dir: config
+            for rel_dir, config in cache.get('tree', {}).items()
+        }
+        
+    def _save_disk_cache(self):
+        """
+        Write config file hashes, parsed configs and the resolved tree atomically
+        
+        Dates are stored with a type tag. Configs holding values JSON cannot
+        round-trip (non-string keys, sets, binary) are not cached, so a warm
+        run always returns the same values and types as a cold one.
+        """
+        if self.cache_path is None:
+            return
+        cache = {
+            'version': CACHE_VERSION,
+            'source_dir': str(self.source_dir),
+            'files': {self._relative_key(path): entry for path, entry in sorted(self.config_files.items())},
+            'tree': {self._relative_key(directory): config for directory, config in self.config_tree.items()},
+        }
+        try:
+            data = json.dumps(cache, default=_encode_cache_value)
+        except (TypeError, ValueError):
+            data = None
+        if data is None or json.loads(data, object_hook=_decode_cache_value) != cache:
+            # Drop any older cache rather than let it shadow the current configs
+            try:
+                os.remove(self.cache_path)
+            except FileNotFoundError:
+                pass
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(data, encoding='utf-8')
+        os.replace(tmp_path, self.cache_path)
+        
+    def _scan_config_files(self):
+        """Find every _config.yml under source_dir, with one stat per file"""
+        found = {}
+        if not self.source_dir.is_dir():
+            return found
+        for dirpath, dirnames, filenames in os.walk(self.source_dir):
+            # Hidden directories never hold content configs
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            if CONFIG_FILENAME in filenames:
+                config_path = os.path.join(dirpath, CONFIG_FILENAME)
+                stat = os.stat(config_path)
+                found[config_path] = (stat.st_mtime_ns, stat.st_size)
+        return found
+        
+    def _update_config_file(self, config_path, signature):
+        """
+        Refresh the cached entry for a config file
+        
+        Unchanged mtime/size trusts the cached entry; otherwise the file is hashed,
+        and only re-parsed when its content hash actually changed.
+        
+        Returns:
+            bool: True if the parsed config changed
+        """
+        mtime_ns, size = signature
+        entry = self.config_files.get(config_path)
+        if entry and (entry['mtime_ns'], entry['size']) == signature:
+            return False
+        
+        with open(config_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry['sha256'] == digest:
+            entry['mtime_ns'], entry['size'] = mtime_ns, size
+            return False
+        
+        self.config_files[config_path] = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'sha256': digest,
+            'config': yaml.safe_load(data) or {},
+        }
+        return True
+        
+    def build_config_tree(self):
+        """
+        Resolve the configuration of every directory under source_dir in one pass
+        
+        Each directory's config is its own _config.yml merged over its parent's
+        resolved config (child keys override parent keys), so lookups for files
+        never touch the filesystem again. With a cache_dir, an unchanged set of
+        config files loads the resolved tree straight from the disk cache.
+        """
+        found = self._scan_config_files()
+        previous = {path: (entry['mtime_ns'], entry['size']) for path, entry in self.config_files.items()}
+        
+        configs_changed = False
+        for config_path, signature in found.items():
+            configs_changed |= self._update_config_file(config_path, signature)
+        # Drop entries for config files that were deleted
+        for config_path in set(self.config_files) - set(found):
+            del self.config_files[config_path]
+            configs_changed = True
+        
+        if self._disk_tree is not None and not configs_changed:
+            tree = self._disk_tree
+        else:
+            own_configs = {Path(path).parent: entry['config'] for path, entry in self.config_files.items()}
+            tree = {}
+            for directory in sorted(own_configs, key=lambda d: len(d.parts)):
+                parent_config = self._resolve_from_tree(tree, directory.parent)
+                tree[directory] = {**parent_config, **own_configs[directory]}
+        
+        self.config_tree = tree
+        if self.cache_path is not None and (self._disk_tree is None or configs_changed or found != previous):
+            self._save_disk_cache()
+        self._disk_tree = None
+        return tree
+        
+    def refresh_config_tree(self):
+        """
+        Rebuild the config tree if any _config.yml was added, removed or modified
+        
+        Costs one stat per config file; unchanged files are not re-parsed.
+        """
+        found = self._scan_config_files()
+        current = {path: (entry['mtime_ns'], entry['size']) for path, entry in self.config_files.items()}
+        if self.config_tree is None or found != current:
+            self.build_config_tree()
+        return self.config_tree
+        
+    def _resolve_from_tree(self, tree, directory):
+        """Find the resolved config for a directory by walking up to its nearest configured ancestor"""
+        current = directory
+        while True:
+            if current in tree:
+                return tree[current]
+            if current == self.source_dir or current == current.parent:
+                return {}
             current = current.parent
-            
-        self.config_cache[cache_key] = config
+        
+    def load_directory_config(self, directory_path):
+        """Load Jekyll-style YAML configuration for a specific directory (inherited from parents)"""
+        if self.config_tree is None:
+            with self._tree_lock:
+                if self.config_tree is None:
+                    self.build_config_tree()
+        directory = Path(os.path.abspath(directory_path))
+        config = self.config_tree.get(directory)
+        if config is None:
+            # Memoize so later files in the same directory are a single lookup
+            config = self._resolve_from_tree(self.config_tree, directory)
+            self.config_tree[directory] = config
         return config
         
     def get_file_metadata(self, file_path, doc_name=None):
@@ -1,11 +1,328 @@
 from datetime import datetime
+import hashlib
 import json
+import random
+import threading
+import time
+from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 import os
 from dotenv import load_dotenv
 
 load_dotenv()  # Load environment variables from .env file
 
+GITHUB_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Transient failures worth retrying; 403/429 are retried only when they are rate limits
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # seconds, doubled on each attempt
+BACKOFF_MAX = 60.0  # seconds, cap for any single wait
+REQUEST_TIMEOUT = 30  # seconds
+
+# On-disk response cache: REST responses are revalidated with ETag/Last-Modified
+# (a 304 costs no rate limit). GraphQL has no validators, so a GraphQL response is
+# only reused, for up to the TTL, when the caller opts in with cache=True.
+CACHE_DIR = Path('.build_cache/github')
+GRAPHQL_CACHE_TTL = int(os.getenv('GITHUB_GRAPHQL_CACHE_TTL', '300'))  # seconds, 0 disables
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+class GitHubClient:
+    """
+    Shared HTTP client for the GitHub scripts.
+    
+    Requests go through one requests.Session, so TLS connections are pooled and
+    kept alive across calls. Transient errors (5xx, connection resets) and rate
+    limits (primary and secondary) are retried with exponential backoff and
+    jitter, waiting for Retry-After or X-RateLimit-Reset when GitHub sends them.
+    
+    Successful responses are cached on disk (one JSON file per request under
+    cache_dir): REST GETs are sent with If-None-Match/If-Modified-Since and a
+    304 is answered from the cache. GraphQL POSTs made with cache=True are
+    keyed by query and variables and reused until graphql_ttl expires; all
+    other POSTs always go to GitHub. cached_result stores a whole computed
+    result (e.g. every page of a listing) under the same TTL.
+    """
+    
+    def __init__(self, max_retries=MAX_RETRIES, pool_size=10, cache_dir=CACHE_DIR, graphql_ttl=GRAPHQL_CACHE_TTL):
+        self.max_retries = max_retries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.graphql_ttl = graphql_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def is_rate_limited(self, response):
+        """True when a 403/429 response is a primary or secondary rate limit"""
+        if response.status_code not in (403, 429):
+            return False
+        return ('Retry-After' in response.headers
+                or response.headers.get('X-RateLimit-Remaining') == '0'
+                or 'rate limit' in response.text.lower())
+    
+    def should_retry(self, response):
+        """True when the response is a transient failure worth retrying"""
+        return response.status_code in RETRY_STATUS_CODES or self.is_rate_limited(response)
+    
+    def backoff_delay(self, attempt):
+        """Exponential backoff with full jitter: a random wait up to base * 2^attempt"""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    
+    def retry_delay(self, response, attempt):
+        """
+        Seconds to wait before retrying a response.
+        
+        Retry-After (secondary rate limits, 429/503) wins, then X-RateLimit-Reset
+        when the primary limit is exhausted, then jittered exponential backoff.
+        """
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        reset = response.headers.get('X-RateLimit-Reset')
+        if response.headers.get('X-RateLimit-Remaining') == '0' and reset and reset.isdigit():
+            return max(0.0, int(reset) - time.time()) + random.uniform(0, 1)
+        return self.backoff_delay(attempt)
+    
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session, retrying transient failures.
+        
+        Returns the final response (which may still be an error after the last
+        retry); connection errors are re-raised once retries are exhausted.
+        """
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"⚠️  {method} {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                if last_attempt or not self.should_retry(response):
+                    return response
+                delay = self.retry_delay(response, attempt)
+                print(f"⚠️  {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def cache_path(self, *parts):
+        """Cache file for a request, named by the hash of its identifying parts"""
+        key = hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def load_cache_entry(self, path):
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+    
+    def save_cache_entry(self, path, response):
+        """Store a response body and its validators"""
+        self.write_cache_file(path, {
+            'fetched_at': time.time(),
+            'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            'body': response.text
+        })
+    
+    def write_cache_file(self, path, entry):
+        """Write a cache entry (atomic write, safe across threads)"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+            tmp_path.replace(path)
+        except OSError as e:
+            print(f"⚠️  Could not write GitHub cache entry {path}: {e}")
+    
+    def cached_response(self, url, entry):
+        """Rebuild a 200 response from a cache entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = 'utf-8'
+        response._content = entry['body'].encode('utf-8')
+        return response
+    
+    def cached_result(self, key, fetch):
+        """
+        Return fetch(), reusing its stored result for up to graphql_ttl seconds.
+        
+        key (a JSON-serializable tuple) names the result. The result is stored
+        as one entry, so a cached read never mixes data from different fetches.
+        """
+        if self.cache_dir is None or self.graphql_ttl <= 0:
+            return fetch()
+        path = self.cache_path('RESULT', *key)
+        entry = self.load_cache_entry(path)
+        if entry and time.time() - entry['fetched_at'] < self.graphql_ttl:
+            return entry['result']
+        result = fetch()
+        self.write_cache_file(path, {'fetched_at': time.time(), 'result': result})
+        return result
+    
+    def get(self, url, **kwargs):
+        """GET with conditional revalidation against the on-disk cache"""
+        if self.cache_dir is None:
+            return self.request('GET', url, **kwargs)
+        headers = dict(kwargs.get('headers') or {})
+        path = self.cache_path('GET', url, kwargs.get('params'), headers)
+        entry = self.load_cache_entry(path)
+        if entry:
+            if 'ETag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if 'Last-Modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+            kwargs['headers'] = headers
+        response = self.request('GET', url, **kwargs)
+        if entry and response.status_code == 304:
+            return self.cached_response(url, entry)
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self.save_cache_entry(path, response)
+        return response
+    
+    def post(self, url, cache=False, **kwargs):
+        """
+        POST, optionally answering a repeated GraphQL query from the cache.
+        
+        With cache=True the response may be up to graphql_ttl seconds old, so
+        only opt in for data that tolerates that staleness. Paginated reads and
+        anything that drives writes or deletions must leave it off.
+        """
+        if not cache or self.cache_dir is None or self.graphql_ttl <= 0 or url != GITHUB_GRAPHQL_URL or 'json' not in kwargs:
+            return self.request('POST', url, **kwargs)
+        headers = kwargs.get('headers') or {}
+        path = self.cache_path('POST', url, kwargs['json'], headers.get('Authorization'))
+        entry = self.load_cache_entry(path)
+        if entry and time.time() - entry['fetched_at'] < self.graphql_ttl:
+            return self.cached_response(url, entry)
+        response = self.request('POST', url, **kwargs)
+        # GraphQL reports query errors with a 200 status; never cache those
+        if response.status_code == 200:
+            try:
+                if 'errors' not in response.json():
+                    self.save_cache_entry(path, response)
+            except ValueError:
+                pass
+        return response
+
+# Module-level client shared by all GitHub API calls (also used by pull_issues.py, prs_issues.py, prs_issues_summary.py)
+client = GitHubClient()
+
+class GitHubQueryError(Exception):
+    """Raised when a GraphQL query fails part-way through pagination."""
+    pass
+
+# Remaining comment pages of an issue or pull request, fetched only when its first page was truncated
+COMMENTS_QUERY = """
+query($id: ID!, $cursor: String) {
+    node(id: $id) {
+        ... on Issue {
+            comments(first: 100, after: $cursor) {
+                nodes { body author { login } }
+                pageInfo { endCursor hasNextPage }
+            }
+        }
+        ... on PullRequest {
+            comments(first: 100, after: $cursor) {
+                nodes { body author { login } }
+                pageInfo { endCursor hasNextPage }
+            }
+        }
+    }
+}
+"""
+
+def run_graphql_query(token, query, variables=None, cache=False):
+    """
+    Run a GraphQL query through the shared client.
+    
+    Parameters:
+    - cache (bool): Allow a cached response up to GRAPHQL_CACHE_TTL seconds old (see GitHubClient.post).
+    
+    Returns:
+    - dict: The response's 'data' object.
+    
+    Raises:
+    - GitHubQueryError: On a non-200 status or GraphQL errors.
+    """
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    response = client.post(GITHUB_GRAPHQL_URL, cache=cache, json={'query': query, 'variables': variables or {}}, headers=headers)
+    if response.status_code != 200:
+        raise GitHubQueryError(f"status code {response.status_code}: {response.text}")
+    body = response.json()
+    if body.get('errors'):
+        raise GitHubQueryError(f"Error in GraphQL query: {body['errors']}")
+    return body['data']
+
+def paginate_connection(token, query, variables, path, cursor=None, cache=False):
+    """
+    Yield the nodes of a GraphQL connection one page at a time.
+    
+    The query must accept a $cursor variable and select `nodes` and
+    `pageInfo { endCursor hasNextPage }` on the connection found at `path`
+    (keys below 'data', e.g. ('repository', 'issues')). Pages are yielded as
+    they arrive, so callers can process them without holding every page.
+    
+    Parameters:
+    - cursor (str): Resume after this cursor instead of starting from the first page.
+    - cache (bool): Allow cached pages. Pages expire independently, so a cached
+      page can be followed by a fresh one; leave off unless the data is static.
+    """
+    variables = dict(variables, cursor=cursor)
+    while True:
+        connection = run_graphql_query(token, query, variables, cache=cache)
+        for key in path:
+            connection = (connection or {}).get(key)
+        if connection is None:
+            raise GitHubQueryError(f"No data at {'.'.join(path)}")
+        yield connection['nodes']
+        if not connection['pageInfo']['hasNextPage']:
+            break
+        variables['cursor'] = connection['pageInfo']['endCursor']
+
+def iter_connection_nodes(token, query, variables, path, cache=False):
+    """Yield every node of a GraphQL connection, following pagination (see paginate_connection)"""
+    for page in paginate_connection(token, query, variables, path, cache=cache):
+        yield from page
+
+def fetch_connection_nodes(token, query, variables, path, cache=False):
+    """
+    Return every node of a GraphQL connection as a list (see paginate_connection).
+    
+    With cache=True the complete listing may be up to GRAPHQL_CACHE_TTL seconds
+    old. Unlike cached pages, it is cached as a whole, so it is always one
+    consistent snapshot; only opt in where that staleness is acceptable.
+    """
+    def fetch():
+        return list(iter_connection_nodes(token, query, variables, path))
+    if not cache:
+        return fetch()
+    return client.cached_result(('GRAPHQL', query, variables, list(path), token), fetch)
+
+def complete_comments(token, node):
+    """
+    Fetch the remaining comments of an issue or pull request in place.
+    
+    The node must carry its `id` and `comments { nodes pageInfo }`; extra pages
+    are requested only when the first page reports hasNextPage.
+    """
+    comments = node.get('comments')
+    if not comments or not comments.get('pageInfo', {}).get('hasNextPage'):
+        return node
+    for page in paginate_connection(token, COMMENTS_QUERY, {'id': node['id']}, ('node', 'comments'),
+                                    cursor=comments['pageInfo']['endCursor']):
+        comments['nodes'].extend(page)
+    comments['pageInfo'] = {'endCursor': None, 'hasNextPage': False}
+    return node
+
 def get_token_dotenv():
     """Retrieve the GitHub token from environment variables."""
     return os.getenv('GITHUB_TOKEN')
@@ -16,7 +333,7 @@ def get_token_aws():
     headers = {'Content-Type': 'application/json'}
 
     try:
-        response = requests.post(api_endpoint, headers=headers)
+        response = client.post(api_endpoint, headers=headers)
         if response.status_code == 200:
             # Assuming the API returns a JSON object with the token in a field named 'token'
             return response.json().get('token')
@@ -53,7 +370,7 @@ def get_target_info():
 
 def test_token(token):
     """Test the GitHub token by fetching the current user's profile."""
-    response = requests.get('https://api.github.com/user', headers={'Authorization': f'token {token}'})
+    response = client.get('https://api.github.com/user', headers={'Authorization': f'token {token}'})
     if response.status_code == 200:
         print("Token is valid.")
         return True
@@ -62,18 +379,21 @@ def test_token(token):
         return False
     
 def list_org_repos(token, org_name):
-    """List all repositories for a given organization."""
-    url = f'https://api.github.com/orgs/{org_name}/repos'
+    """List all repositories for a given organization, handling pagination."""
+    repos = []
+    url = f'https://api.github.com/orgs/{org_name}/repos?per_page=100'
     headers = {
         'Authorization': f'token {token}',
         'Accept': 'application/vnd.github.v3+json'
     }
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json()  # List of repositories
-    else:
-        print(f"Failed to list repositories for {org_name}, Status Code: {response.status_code}")
-        return None
+    while url:
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            print(f"Failed to list repositories for {org_name}, Status Code: {response.status_code}")
+            return None
+        repos.extend(response.json())  # List of repositories
+        url = response.links.get('next', {}).get('url')
+    return repos
 
 def fetch_profile(token, target_type, target_name):
     """Fetch profile information of a specified organization or user."""
@@ -85,7 +405,7 @@ def fetch_profile(token, target_type, target_name):
         print("Invalid target type. Use 'organization' or 'user'.")
         return None
 
-    response = requests.get(url, headers={'Authorization': f'token {token}'})
+    response = client.get(url, headers={'Authorization': f'token {token}'})
     if response.status_code == 200:
         return response.json()
     else:
@@ -148,7 +468,8 @@ def fetch_user_commits(token, username):
     }
     
     # Make the request
-    response = requests.post('https://api.github.com/graphql', json=payload, headers=headers)
+    # Commit totals are a report, not synced data; a response up to GRAPHQL_CACHE_TTL old is fine
+    response = client.post(GITHUB_GRAPHQL_URL, cache=True, json=payload, headers=headers)
     
     # Check for errors
     if response.status_code == 200:
@@ -161,7 +482,7 @@ def fetch_user_organization_commits(token, username, organization):
     query = f"org:{organization} author:{username}"
     url = f"https://api.github.com/search/commits?q={query}"
     
-    response = requests.get(url, headers=headers)
+    response = client.get(url, headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -177,7 +498,7 @@ def list_org_projects(token, org_name):
     }
     
     while url:
-        response = requests.get(url, headers=headers)
+        response = client.get(url, headers=headers)
         if response.status_code == 200:
             projects.extend(response.json())
             # Check if there is a 'next' page
@@ -206,7 +527,7 @@ def list_org_projects_v2(token, org_login):
     """ 
        
     projects = [] # List to store projects
-    graphql_url = 'https://api.github.com/graphql' # GitHub GraphQL API endpoint
+    graphql_url = GITHUB_GRAPHQL_URL # GitHub GraphQL API endpoint
     headers = { #  credentials and content type for the request
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json',
@@ -250,7 +571,7 @@ def list_org_projects_v2(token, org_login):
 
     while True:
         # Send a POST request to the GraphQL API with the query and variables defined above
-        response = requests.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
+        response = client.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
         if response.status_code == 200:
             data = response.json()['data']['organization']['projectsV2'] # location of project 
             projects.extend([edge['node'] for edge in data['edges']]) # add projects to the list 
@@ -277,7 +598,7 @@ def list_org_projects_v2_with_issues(token, org_login):
             Each issue includes id, title, url, body, and custom fields.
     """
     projects_with_issues = []
-    graphql_url = 'https://api.github.com/graphql'
+    graphql_url = GITHUB_GRAPHQL_URL
     headers = {
         'Authorization': f'Bearer {token}',
         'Content-Type': 'application/json',
@@ -338,7 +659,7 @@ def list_org_projects_v2_with_issues(token, org_login):
     variables = {'orgLogin': org_login, 'cursor': None}
 
     while True:
-        response = requests.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
+        response = client.post(graphql_url, headers=headers, json={'query': query, 'variables': variables})
         response_json = response.json()
         
         # Check for successful response
@@ -542,7 +863,7 @@ if __name__ == "__main__":
                 for commit in commits['items']:
                     commit_url = commit['url']
                     # Make an additional request to fetch detailed commit data
-                    response = requests.get(commit_url, headers={"Authorization": f"Bearer {token}"})
+                    response = client.get(commit_url, headers={"Authorization": f"Bearer {token}"})
                     if response.status_code == 200:
                         commit_data = response.json()
                         additions = commit_data['stats']['additions']
@@ -0,0 +1,103 @@
+"""
+Incremental sync state for posts generated from GitHub issues and pull requests.
+
+Used by pull_issues.py and prs_issues.py. Each sync source (a repository, or an
+organization's projects) records which post file every GitHub item produced and the newest
+updatedAt it has seen, in .build_cache/github_sync.json. A run can then:
+    - fetch only items updated since the watermark,
+    - rewrite a post only when its rendered content changed (so mtimes and
+      Jekyll rebuilds stay untouched otherwise),
+    - move a post when its item's title/date changes the file name,
+    - delete posts for items that no longer exist.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+STATE_FILE = Path('.build_cache/github_sync.json')
+
+# Several sources may save from worker threads; the state file is shared
+_state_lock = threading.Lock()
+
+
+def load_state(state_file=STATE_FILE):
+    try:
+        return json.loads(Path(state_file).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+class PostSync:
+    """
+    Sync state for one source of posts.
+
+    Attributes:
+        name (str): Source key, e.g. 'repo:open-coding-society/flask_2025'
+        watermark (str): Newest updatedAt (ISO 8601) seen by the last completed sync, or None
+        posts (dict): Item key (GitHub item id, or post path for projects) -> {'path', 'updated_at'}
+    """
+
+    def __init__(self, name, state_file=STATE_FILE):
+        self.name = name
+        self.state_file = Path(state_file)
+        entry = load_state(self.state_file).get(name, {})
+        self.watermark = entry.get('watermark')
+        self.posts = entry.get('posts', {})
+        self.newest = self.watermark
+        self.written = 0
+        self.unchanged = 0
+        self.deleted = 0
+
+    def write_post(self, item_id, path, content, updated_at=None):
+        """
+        Write an item's post if its content changed, removing the old file if it moved.
+
+        Returns:
+            bool: True if the file was written
+        """
+        path = Path(path).as_posix()
+        previous = self.posts.get(item_id)
+        if previous and previous['path'] != path:
+            self.remove_file(previous['path'])
+        self.posts[item_id] = {'path': path, 'updated_at': updated_at}
+        if updated_at and (self.newest is None or updated_at > self.newest):
+            self.newest = updated_at
+
+        try:
+            if Path(path).read_text(encoding='utf-8') == content:
+                self.unchanged += 1
+                return False
+        except OSError:
+            pass
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        self.written += 1
+        return True
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+            self.deleted += 1
+        except FileNotFoundError:
+            pass
+
+    def prune(self, live_ids):
+        """Delete posts of tracked items that are not in live_ids (deleted or transferred on GitHub)"""
+        live_ids = set(live_ids)
+        for item_id in [item_id for item_id in self.posts if item_id not in live_ids]:
+            self.remove_file(self.posts.pop(item_id)['path'])
+
+    def save(self):
+        """Record posts and advance the watermark (call only after a complete sync)"""
+        with _state_lock:
+            state = load_state(self.state_file)
+            state[self.name] = {'watermark': self.newest, 'posts': self.posts}
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(state, indent=2, sort_keys=True), encoding='utf-8')
+            tmp_file.replace(self.state_file)
+
+    def summary(self):
+        return f"{self.written} written, {self.unchanged} unchanged, {self.deleted} deleted"
@@ -1,7 +1,41 @@
+import argparse
 import json
 import os
-import requests
 from datetime import datetime
+import github_api_funcs as gha
+import github_sync
+
+def render_markdown(issue_data, type):
+    """
+    Render the Markdown post for a GitHub issue or pull request.
+    
+    Args:
+        issue_data (dict): Dictionary containing issue or pull request data.
+        type (str): Type of the content, either 'issue' or 'pull_request'.
+    
+    Returns:
+        str: The post content.
+    """
+    # Front matter
+    parts = [
+        '---\n',
+        f"title: '{issue_data['title']}'\n",
+        'layout: post\n',  # Adjust layout as needed
+        f"tags: [github, {type}]\n",  # Add relevant tags
+        f"type: {type}\n",
+        "description: Automatically Populated GitHub Issue or Pull Request\n",
+        '---\n\n',
+        # Issue or pull request body
+        f"[{type.capitalize()} Link]({issue_data['url']})\n\n",
+        issue_data['body'] + '\n\n'
+    ]
+    
+    # Comments if available
+    if 'comments' in issue_data:
+        parts.append('## Comments\n\n')
+        for comment in issue_data['comments']:
+            parts.append(f"**{comment['author']['login']}**: {comment['body']}\n\n")
+    return ''.join(parts)
 
 def generate_markdown_file(issue_data, file_path, type):
     """
@@ -13,128 +47,145 @@ def generate_markdown_file(issue_data, file_path, type):
         type (str): Type of the content, either 'issue' or 'pull_request'.
     """
     with open(file_path, 'w', encoding='utf-8') as file:
-        # Write front matter
-        file.write('---\n')
-        file.write(f"title: '{issue_data['title']}'\n")
-        file.write('layout: post\n')  # Adjust layout as needed
-        file.write(f"tags: [github, {type}]\n")  # Add relevant tags
-        file.write(f"type: {type}\n")
-        file.write("description: Automatically Populated GitHub Issue or Pull Request\n")
-        file.write('---\n\n')
-        
-        # Write issue or pull request body
-        file.write(f"[{type.capitalize()} Link]({issue_data['url']})\n\n")
-        file.write(issue_data['body'] + '\n\n')
-        
-        # Write comments if available
-        if 'comments' in issue_data:
-            file.write('## Comments\n\n')
-            for comment in issue_data['comments']:
-                file.write(f"**{comment['author']['login']}**: {comment['body']}\n\n")
+        file.write(render_markdown(issue_data, type))
 
-def get_github_repository_issues_and_prs(token, owner, repo):
-    # Construct the GraphQL query
-    query = f"""
-    query {{
-        repository(owner: "{owner}", name: "{repo}") {{
-            issues(first: 100) {{
-                nodes {{
-                    title
-                    body
-                    url
-                    createdAt
-                    comments(first: 10) {{
-                        nodes {{
-                            body
-                            author {{
-                                login
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-            pullRequests(first: 100) {{
-                nodes {{
-                    title
-                    body
-                    url
-                    createdAt
-                    author {{
-                        login
-                    }}
-                    comments(first: 10) {{
-                        nodes {{
-                            body
-                            author {{
-                                login
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-        }}
-    }}
-    """
+# Issues or pull requests of a repository, 100 per page, most recently updated first.
+# %(variables)s and %(connection)s come from REPOSITORY_CONNECTIONS.
+# Only the first page of comments is inlined, gha.complete_comments fetches the rest when needed.
+REPOSITORY_ITEMS_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String%(variables)s) {
+    repository(owner: $owner, name: $repo) {
+        %(connection)s {
+            nodes {
+                id
+                title
+                body
+                url
+                createdAt
+                updatedAt
+                author {
+                    login
+                }
+                comments(first: 10) {
+                    nodes {
+                        body
+                        author {
+                            login
+                        }
+                    }
+                    pageInfo {
+                        endCursor
+                        hasNextPage
+                    }
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
+    }
+}
+"""
 
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
+# Connection arguments; issues can filter by updatedAt on the server, pull requests cannot
+REPOSITORY_CONNECTIONS = {
+    'issues': {
+        'variables': ', $since: DateTime',
+        'connection': 'issues(first: 100, after: $cursor, filterBy: {since: $since}, orderBy: {field: UPDATED_AT, direction: DESC})'
+    },
+    'pullRequests': {
+        'variables': '',
+        'connection': 'pullRequests(first: 100, after: $cursor, orderBy: {field: UPDATED_AT, direction: DESC})'
     }
+}
 
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
+# Ids of every issue or pull request, used to find posts whose item was deleted or transferred
+REPOSITORY_IDS_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String) {
+    repository(owner: $owner, name: $repo) {
+        %s(first: 100, after: $cursor) {
+            nodes {
+                id
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
+    }
+}
+"""
 
-    # Check for successful response
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch data:", response.text)
-        return None
+def iter_repository_items(token, owner, repo, connection, since=None):
+    """
+    Yield a repository's issues or pull requests with all of their comments.
+    
+    Args:
+        connection (str): 'issues' or 'pullRequests'.
+        since (str, optional): Only items updated at or after this ISO 8601 timestamp.
+    """
+    query = REPOSITORY_ITEMS_QUERY % REPOSITORY_CONNECTIONS[connection]
+    variables = {'owner': owner, 'repo': repo}
+    if connection == 'issues':
+        variables['since'] = since
+    # Never from the response cache: a stale page would let the watermark skip items
+    for node in gha.iter_connection_nodes(token, query, variables, ('repository', connection), cache=False):
+        # Newest first, so the rest of the pull requests are older than the watermark
+        if since and node['updatedAt'] < since:
+            return
+        yield gha.complete_comments(token, node)
 
-def create_issues_and_prs():
-    token = os.environ.get('GITHUB_TOKEN')  # via GitHub secrets
-    owner = "open-coding-society"  # replace with your repository owner
-    repo = "flask_2025"  # replace with your repository name
+def iter_repository_ids(token, owner, repo, connection):
+    """Yield the id of every issue or pull request in a repository"""
+    query = REPOSITORY_IDS_QUERY % connection
+    # Never from the response cache: a stale listing would prune posts of new items
+    for node in gha.iter_connection_nodes(token, query, {'owner': owner, 'repo': repo}, ('repository', connection), cache=False):
+        yield node['id']
 
-    data = get_github_repository_issues_and_prs(token, owner, repo)
-    if not data:
-        return
+def post_path(item, suffix):
+    return f"_posts/{item['createdAt'][:10]}-{item['title'].replace(' ', '-').replace('/', ' ')}{suffix}"
 
-    # Debugging: Print the response data
-    print(json.dumps(data, indent=2))
+def create_issues_and_prs(owner="open-coding-society", repo="flask_2025", full=False):
+    """
+    Sync posts for a repository's issues and pull requests.
+    
+    Only items updated since the last sync's watermark are fetched (everything
+    with full=True), posts are rewritten only when their content changed, and
+    posts of deleted items are removed.
+    """
+    token = os.environ.get('GITHUB_TOKEN')  # via GitHub secrets
+    sync = github_sync.PostSync(f"repo:{owner}/{repo}")
+    since = None if full else sync.watermark
 
-    # Check if 'data' key exists in the response
-    if 'data' not in data:
-        print("Error: 'data' key not found in the response")
+    # Posts are written page by page as the issues and pull requests arrive
+    try:
+        for connection, type, suffix in (("issues", "issue", "_GithubIssue.md"), ("pullRequests", "pull_request", "_GithubPR.md")):
+            for item in iter_repository_items(token, owner, repo, connection, since):
+                item_data = {
+                    'title': item["title"],
+                    'body': item["body"],
+                    'url': item["url"],
+                    'created_at': item["createdAt"][:10],
+                    'comments': item["comments"]["nodes"]
+                }
+                sync.write_post(item["id"], post_path(item, suffix), render_markdown(item_data, type), item["updatedAt"])
+        
+        live_ids = [item_id for connection in ("issues", "pullRequests")
+                    for item_id in iter_repository_ids(token, owner, repo, connection)]
+    except gha.GitHubQueryError as e:
+        # The watermark is not advanced, so the next run retries from the same point
+        print("Failed to fetch data:", e)
         return
     
-    issues = data["data"]["repository"]["issues"]["nodes"]
-    pull_requests = data["data"]["repository"]["pullRequests"]["nodes"]
-
-    for issue in issues:
-        issue_data = {
-            'title': issue["title"],
-            'body': issue["body"],
-            'url': issue["url"],
-            'created_at': issue["createdAt"][:10],
-            'comments': issue["comments"]["nodes"]
-        }
-        generate_markdown_file(issue_data, f"_posts/{issue_data['created_at']}-{issue['title'].replace(' ', '-').replace('/', ' ')}_GithubIssue.md", "issue")
-
-    for pr in pull_requests:
-        pr_data = {
-            'title': pr["title"],
-            'body': pr["body"],
-            'url': pr["url"],
-            'created_at': pr["createdAt"][:10],
-            'comments': pr["comments"]["nodes"]
-        }
-        generate_markdown_file(pr_data, f"_posts/{pr_data['created_at']}-{pr['title'].replace(' ', '-').replace('/', ' ')}_GithubPR.md", "pull_request")
+    sync.prune(live_ids)
+    sync.save()
+    print(f"✅ {owner}/{repo}: {sync.summary()}" + (f" (updated since {since})" if since else ""))
 
 if __name__ == "__main__":
-    create_issues_and_prs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Sync posts for GitHub issues and pull requests')
+    parser.add_argument('--owner', default="open-coding-society", help='Repository owner')
+    parser.add_argument('--repo', default="flask_2025", help='Repository name')
+    parser.add_argument('--full', action='store_true', help='Fetch every item instead of only those updated since the last sync')
+    args = parser.parse_args()
+    create_issues_and_prs(args.owner, args.repo, full=args.full)
@@ -1,7 +1,13 @@
+import argparse
 import json
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+import github_api_funcs as gha
+
+DEFAULT_OWNER = "open-coding-society"
+DEFAULT_REPOS = ["pages", "flask_2025", "kasm-multi-server"]
+MAX_CONCURRENT_FETCHES = 8  # stays within the shared client's connection pool
 
 def generate_json_file(data, file_path):
     """
@@ -14,116 +20,154 @@ def generate_json_file(data, file_path):
     with open(file_path, 'w', encoding='utf-8') as file:
         json.dump(data, file, indent=4)
 
-def get_github_repository_issues_and_prs(token, owner, repo):
-    # Construct the GraphQL query
-    query = f"""
-    query {{
-        repository(owner: "{owner}", name: "{repo}") {{
-            issues(first: 100) {{
-                nodes {{
-                    title
-                    url
-                    createdAt
-                    author {{
-                        login
-                    }}
-                    comments(first: 10) {{
-                        nodes {{
-                            body
-                            author {{
-                                login
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-            pullRequests(first: 100) {{
-                nodes {{
-                    title
-                    url
-                    createdAt
-                    author {{
-                        login
-                    }}
-                    comments(first: 10) {{
-                        nodes {{
-                            body
-                            author {{
-                                login
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-        }}
-    }}
-    """
-
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
+# Issues or pull requests of a repository, 100 per page; %s is the connection name.
+# Comments are not part of the summary, so they are not requested.
+REPOSITORY_ITEMS_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String) {
+    repository(owner: $owner, name: $repo) {
+        %s(first: 100, after: $cursor) {
+            nodes {
+                title
+                url
+                createdAt
+                author {
+                    login
+                }
+            }
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+        }
     }
+}
+"""
 
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
-
-    # Check for successful response
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch data:", response.text)
-        return None
+def fetch_repository_items(token, owner, repo, connection):
+    """
+    Fetch a repository's issues or pull requests, following pagination.
+    
+    The summary is a read-only report, so the whole listing is reused from the
+    cache for up to GRAPHQL_CACHE_TTL seconds and repeat runs cost no rate limit.
+    
+    Args:
+        connection (str): 'issues' or 'pullRequests'.
+    """
+    query = REPOSITORY_ITEMS_QUERY % connection
+    return gha.fetch_connection_nodes(token, query, {'owner': owner, 'repo': repo}, ('repository', connection), cache=True)
 
-def create_issues_and_prs_json(owner="open-coding-society", repo="pages"):
-    token = os.environ.get('GITHUB_TOKEN')  # via GitHub secrets
+def author_login(node):
+    """Login of an issue/PR author; deleted accounts come back as null ('ghost' on GitHub)"""
+    return (node.get("author") or {}).get("login", "ghost")
+
+def organize_by_author(issues, pull_requests):
+    """
+    Group a repository's issues and pull requests by author.
+    
+    Args:
+        issues (iterable): Issue nodes, e.g. from fetch_repository_items.
+        pull_requests (iterable): Pull request nodes.
+    
+    Returns:
+        dict: {author: {"issues": [...], "pull_requests": [...]}}
+    """
+    author_data = {}
 
-    data = get_github_repository_issues_and_prs(token, owner, repo)
-    if not data:
-        return
+    for nodes, key in ((issues, "issues"), (pull_requests, "pull_requests")):
+        for node in nodes:
+            author = author_login(node)
+            if author not in author_data:
+                author_data[author] = {"issues": [], "pull_requests": []}
+            author_data[author][key].append({
+                'title': node["title"],
+                'url': node["url"],
+                'created_at': node["createdAt"][:10]
+            })
 
-    # Debugging: Print the response data
-    print(json.dumps(data, indent=2))
+    return author_data
 
-    # Check if 'data' key exists in the response
-    if 'data' not in data:
-        print("Error: 'data' key not found in the response")
-        return
+def create_issues_and_prs_json(owner=DEFAULT_OWNER, repo="pages", token=None):
+    """
+    Fetch one repository's issues and pull requests and write _posts/{repo}-by_author.json.
     
-    issues = data["data"]["repository"]["issues"]["nodes"]
-    pull_requests = data["data"]["repository"]["pullRequests"]["nodes"]
-
-    # Organize data by author
-    author_data = {}
+    Returns:
+        dict or None: The by-author data, or None if the fetch failed.
+    """
+    token = token or os.environ.get('GITHUB_TOKEN')  # via GitHub secrets
 
-    for issue in issues:
-        author = issue["author"]["login"]
-        if author not in author_data:
-            author_data[author] = {"issues": [], "pull_requests": []}
-        author_data[author]["issues"].append({
-            'title': issue["title"],
-            'url': issue["url"],
-            'created_at': issue["createdAt"][:10]
-        })
-
-    for pr in pull_requests:
-        author = pr["author"]["login"]
-        if author not in author_data:
-            author_data[author] = {"issues": [], "pull_requests": []}
-        author_data[author]["pull_requests"].append({
-            'title': pr["title"],
-            'url': pr["url"],
-            'created_at': pr["createdAt"][:10]
-        })
+    # Pages are grouped as they arrive rather than collected into one response
+    try:
+        author_data = organize_by_author(fetch_repository_items(token, owner, repo, "issues"),
+                                         fetch_repository_items(token, owner, repo, "pullRequests"))
+    except gha.GitHubQueryError as e:
+        print(f"Failed to fetch data for {owner}/{repo}:", e)
+        return None
 
     # Generate JSON file
     generate_json_file(author_data, f"_posts/{repo}-by_author.json")
+    return author_data
+
+def merge_author_data(merged, repo, author_data):
+    """Fold one repository's by-author data into the merged summary, tagging entries with the repo"""
+    for author, items in author_data.items():
+        entry = merged.setdefault(author, {"issues": [], "pull_requests": []})
+        for key in ("issues", "pull_requests"):
+            entry[key].extend(dict(item, repo=repo) for item in items[key])
+
+def create_summaries(repos, owner=DEFAULT_OWNER, max_workers=MAX_CONCURRENT_FETCHES):
+    """
+    Fetch many repositories concurrently and merge their summaries by author.
+    
+    Each repository still gets its own _posts/{repo}-by_author.json; results are
+    merged as each fetch completes and written to _posts/{owner}-by_author.json.
+    Total time is roughly that of the slowest repository.
+    """
+    token = os.environ.get('GITHUB_TOKEN')  # via GitHub secrets
+    merged = {}
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(repos)))) as executor:
+        futures = {executor.submit(create_issues_and_prs_json, owner, repo, token): repo for repo in repos}
+        for future in as_completed(futures):
+            repo = futures[future]
+            try:
+                author_data = future.result()
+            except Exception as e:
+                print(f"❌ {owner}/{repo}: {e}")
+                failed.append(repo)
+                continue
+            if author_data is None:
+                failed.append(repo)
+                continue
+            merge_author_data(merged, repo, author_data)
+            issue_count = sum(len(items["issues"]) for items in author_data.values())
+            pr_count = sum(len(items["pull_requests"]) for items in author_data.values())
+            print(f"✅ {owner}/{repo}: {issue_count} issue(s), {pr_count} PR(s), {len(author_data)} author(s)")
+
+    # Completion order varies between runs; sort so the merged file is stable
+    for items in merged.values():
+        for key in ("issues", "pull_requests"):
+            items[key].sort(key=lambda item: (item['created_at'], item['repo'], item['url']))
+    merged = dict(sorted(merged.items()))
+    generate_json_file(merged, f"_posts/{owner}-by_author.json")
+    print(f"Summarized {len(repos) - len(failed)}/{len(repos)} repositories, {len(merged)} author(s)")
+    if failed:
+        print(f"⚠️  Failed: {', '.join(sorted(failed))}")
+    return merged
 
 if __name__ == "__main__":
-    create_issues_and_prs_json(repo="pages")
-    create_issues_and_prs_json(repo="flask_2025")
-    create_issues_and_prs_json(repo="kasm-multi-server")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Summarize GitHub issues and pull requests by author')
+    parser.add_argument('repos', nargs='*', default=DEFAULT_REPOS, help='Repositories to summarize')
+    parser.add_argument('--owner', default=DEFAULT_OWNER, help='Repository owner (organization or user)')
+    parser.add_argument('--all', action='store_true', help="Summarize all of the organization's repositories")
+    parser.add_argument('--workers', type=int, default=MAX_CONCURRENT_FETCHES, help='Maximum concurrent fetches')
+    args = parser.parse_args()
+
+    repos = args.repos
+    if args.all:
+        org_repos = gha.list_org_repos(os.environ.get('GITHUB_TOKEN'), args.owner)
+        if not org_repos:
+            raise SystemExit(1)
+        repos = [repo['name'] for repo in org_repos]
+
+    create_summaries(repos, owner=args.owner, max_workers=args.workers)
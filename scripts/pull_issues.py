@@ -1,11 +1,50 @@
 import os
-import requests
+import sys
 from datetime import datetime
 import math
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from pathlib import Path
 import github_api_funcs as gha
+import github_sync
 
+# Maps GitHub project titles to the course each project's issues are posted under
+PROJECTS_CONFIG = Path(__file__).parent / 'issue_projects.json'
+
+
+def render_markdown(issue_data, course):
+    """
+    Render the Markdown post for a GitHub issue.
+    
+    Args:
+        issue_data (dict): Dictionary containing issue data.
+        course (str): Course key for the front matter (e.g. 'csa').
+    
+    Returns:
+        str: The post content.
+    """
+    # Front matter
+    parts = [
+        '---\n',
+        f"title: '{issue_data['title']}'\n",
+        'layout: post\n',  # Adjust layout as needed
+        'tags: [github, issue]\n',  # Add relevant tags
+        "courses: {'"+ course + "': {'week': " + str(issue_data['week']) + "}}\n",
+        "type : issues\n",
+        "description : Automatically Populated Github Issue\n",
+        '---\n\n',
+        # Issue body
+        "[Issue Link](" + issue_data['url'] + ")\n\n",
+        issue_data['body'] + '\n\n'
+    ]
+    
+    # Comments if available
+    if 'comments' in issue_data:
+        parts.append('## Comments\n\n')
+        for comment in issue_data['comments']:
+            parts.append(f"**{comment['user']['login']}**: {comment['body']}\n\n")
+    return ''.join(parts)
 
 def generate_markdown_file(issue_data, file_path, course):
     """
@@ -16,141 +55,118 @@ def generate_markdown_file(issue_data, file_path, course):
         file_path (str): Path to save the Markdown file.
     """
     with open(file_path, 'w', encoding='utf-8') as file:
-
-        # Write front matter
-        file.write('---\n')
-        file.write(f"title: '{issue_data['title']}'\n")
-        file.write('layout: post\n')  # Adjust layout as needed
-        
-        file.write('tags: [github, issue]\n')  # Add relevant tags
-        file.write("courses: {'"+ course + "': {'week': " + str(issue_data['week']) + "}}\n")
-        file.write("type : issues\n")
-        file.write("description : Automatically Populated Github Issue\n")
-        file.write('---\n\n')
-        # Write issue body
-        file.write("[Issue Link](" + issue_data['url'] + ")\n\n")
-
-        file.write(issue_data['body'] + '\n\n')
-        
-        # Write comments if available
-        if 'comments' in issue_data:
-            file.write('## Comments\n\n')
-            for comment in issue_data['comments']:
-                file.write(f"**{comment['user']['login']}**: {comment['body']}\n\n")
+        file.write(render_markdown(issue_data, course))
 
 
 # Generate Markdown file
 # generate_markdown_file(issue_data, '_posts/sample_issue.md')
 
-def get_github_repository_issues(token=None):
-    # we need to move the query logic in yml file in order to support multiple queries, specificallly for CSP and CSSE
-    # Construct the GraphQL query, using multiple lines for readability
-    query = """
-    query {
-    organization(login: "open-coding-society") {
-        projectsV2(first: 2) {
+# Projects of the organization (titles only), paginated
+PROJECTS_QUERY = """
+query($org: String!, $cursor: String) {
+organization(login: $org) {
+    projectsV2(first: 20, after: $cursor) {
+    nodes {
+        id
+        title
+    }
+    pageInfo {
+        endCursor
+        hasNextPage
+    }
+    }
+}
+}
+"""
+
+# Issue items of one project, 100 per page
+PROJECT_ITEMS_QUERY = """
+query($id: ID!, $cursor: String) {
+node(id: $id) {
+    ... on ProjectV2 {
+    items(first: 100, after: $cursor) {
         nodes {
-            items(first: 100) {
-            nodes {
-                content{
-                    ... on Issue {
-                    title
-                    body
-                    url
-                    createdAt
-                    projectItems(first: 10){
+            content{
+                ... on Issue {
+                id
+                updatedAt
+                title
+                body
+                url
+                createdAt
+                projectItems(first: 10){
+                    nodes{
+                        fieldValues(first:5){
                         nodes{
-                            fieldValues(first:5){
-                            nodes{
-                                ... on ProjectV2ItemFieldValueCommon{
-                                ... on ProjectV2ItemFieldDateValue{
-                                    date
-                                }
-                                }
+                            ... on ProjectV2ItemFieldValueCommon{
+                            ... on ProjectV2ItemFieldDateValue{
+                                date
                             }
                             }
                         }
+                        }
                     }
                 }
-                }
             }
             }
         }
+        pageInfo {
+            endCursor
+            hasNextPage
         }
     }
     }
+}
+}
+"""
+
+def load_projects_config(path=PROJECTS_CONFIG):
+    """Load the organization, course start date and project title -> course mapping"""
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def list_projects(token, org="open-coding-society"):
+    """List the organization's projects (id and title), following pagination"""
+    return gha.fetch_connection_nodes(token, PROJECTS_QUERY, {'org': org}, ('organization', 'projectsV2'), cache=True)
+
+def fetch_project_items(token, project_id):
+    """
+    Fetch every item of a project, following pagination.
+    
+    The listing is cached whole for up to GRAPHQL_CACHE_TTL seconds, so repeat runs
+    cost no rate limit. Posts are written and pruned from that one snapshot, so a
+    cached listing only delays updates; it never prunes an item it also wrote.
     """
+    return gha.fetch_connection_nodes(token, PROJECT_ITEMS_QUERY, {'id': project_id}, ('node', 'items'), cache=True)
 
-    # Define headers
-    headers = {
-        "Authorization": f"Bearer {token}" if token else None,
-        "Content-Type": "application/json",
-    }
+def issue_due_date(issue):
+    """Due date of a project issue (YYYY-MM-DD), defaulting to today when the field is unset"""
+    for i in [4, 3]:
+        try:
+            return issue["projectItems"]["nodes"][0]["fieldValues"]["nodes"][i]["date"]
+        except (KeyError, IndexError, TypeError):
+            pass  # if the date is not found, continue with the next index
+    return date.today().strftime('%Y-%m-%d')
 
-    # Make the request
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
-
-    # Check for successful response
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Failed to fetch data:", response.text)
-        return None
-
-def create_issues():
-  # extract the GitHub API token from the secrets in AWS Secrets Manager
-  # token = getToken() # via amazon secrets manager
-  token = os.environ.get('GITHUB_TOKEN') # via github secrets
-  
-  # Call the function to get the issues data, then extract a nested data structure from the response, this corresonds to an array of issues
-  # we need to extract the specific project data, perhaps "projectsV2" in the code to yml file, so we can run CSP and CSSE with same python script
-  csa_data = get_github_repository_issues(token)["data"]["organization"]["projectsV2"]["nodes"][0]["items"]["nodes"]
-  # we need to move the data logic into yml file in order to have accurate week calculation
-  date1 = datetime(2023, 8, 21)
-  for issue in csa_data:
-      issue = issue["content"]
-      if issue:
-        dueDate = date.today().strftime('%Y-%m-%d')  # default value
-        for i in [4, 3]:
-            try:
-                dueDate = issue["projectItems"]["nodes"][0]["fieldValues"]["nodes"][i]["date"]
-                break  # if the date is found, exit the loop
-            except:
-                pass  # if the date is not found, continue with the next index
-        year, month, day = map(int, dueDate.split("-"))
-        date2 = datetime(year,month,day)
-        difference = date2 - date1
-        week = difference.days/7
-        issue_data = {
-            'title': issue["title"],
-            'body': issue["body"],
-            'url': issue["url"],
-            'created_at': issue["createdAt"][:10],
-            'week': math.floor(week - 3)
-        }
-        generate_markdown_file(issue_data, f"_posts/{dueDate}-{issue['title'].replace(' ', '-').replace('/', ' ')}_GithubIssue_.md", "csa")
-
-  # Recieves the CSP data through searching the second project entry rather than the first
-  csp_data = get_github_repository_issues(token)["data"]["organization"]["projectsV2"]["nodes"][1]["items"]["nodes"]
-  date1 = datetime(2023, 8, 21)
-  for issue in csp_data:
-      issue = issue["content"]
-      if issue:
-        dueDate = date.today().strftime('%Y-%m-%d')  # default value
-        for i in [4, 3]:
-            try:
-                dueDate = issue["projectItems"]["nodes"][0]["fieldValues"]["nodes"][i]["date"]
-                break  # if the date is found, exit the loop
-            except:
-                pass  # if the date is not found, continue with the next index
+def render_project_posts(token, project, course, start_date):
+    """
+    Render the post for every issue of one project.
+    
+    Project items cannot be filtered by updatedAt on the server, so every item
+    is fetched (from the cached listing on repeat runs) and rendered. Nothing is
+    written here, so projects can be fetched in parallel and merged in a fixed order.
+    
+    Returns:
+        list: (issue id, post path, content, updatedAt) for each issue in the project.
+    """
+    posts = []
+    for item in fetch_project_items(token, project['id']):
+        issue = item["content"]
+        if not issue:
+            continue
+        dueDate = issue_due_date(issue)
         year, month, day = map(int, dueDate.split("-"))
-        date2 = datetime(year,month,day)
-        difference = date2 - date1
-        week = difference.days/7
+        week = (datetime(year, month, day) - start_date).days / 7
         issue_data = {
             'title': issue["title"],
             'body': issue["body"],
@@ -158,7 +174,82 @@ def create_issues():
             'created_at': issue["createdAt"][:10],
             'week': math.floor(week - 3)
         }
-        generate_markdown_file(issue_data, f"_posts/{dueDate}-{issue['title'].replace(' ', '-').replace('/', ' ')}_GithubIssue_.md", "csp")
+        file_path = f"_posts/{dueDate}-{issue['title'].replace(' ', '-').replace('/', ' ')}_GithubIssue_.md"
+        posts.append((issue["id"], file_path, render_markdown(issue_data, course), issue["updatedAt"]))
+    return posts
+
+def sync_project_posts(org, rendered):
+    """
+    Write the merged posts of every project under one sync state and prune the rest.
+    
+    Post file names come from the due date and title only, so the same issue in two
+    projects (or two issues with the same title and due date) map to one file. Projects
+    are merged in config order and the later one wins, as the CSA-then-CSP passes did;
+    every collision is reported. Posts are tracked by path, so a renamed post is removed
+    by the prune and no project can delete a file another project still produces.
+    
+    Args:
+        org (str): Organization the projects belong to (names the sync state).
+        rendered (list): (project title, posts from render_project_posts) in config order.
+    
+    Returns:
+        PostSync: The sync state, with written/unchanged/deleted counts.
+    """
+    merged = {}
+    for title, posts in rendered:
+        for issue_id, path, content, updated_at in posts:
+            if path in merged and merged[path][:2] != (title, issue_id):
+                print(f"⚠️  {path}: {title} replaces the post from {merged[path][0]}")
+            merged[path] = (title, issue_id, content, updated_at)
+
+    sync = github_sync.PostSync(f"projects:{org}")
+    for path, (title, issue_id, content, updated_at) in merged.items():
+        sync.write_post(path, path, content, updated_at)
+    sync.prune(merged)
+    sync.save()
+    return sync
+
+def create_issues(config_path=PROJECTS_CONFIG):
+  """Sync the posts of every configured project; returns the exit status (1 if any project could not be synced)"""
+  # extract the GitHub API token from the secrets in AWS Secrets Manager
+  # token = getToken() # via amazon secrets manager
+  token = os.environ.get('GITHUB_TOKEN') # via github secrets
+  config = load_projects_config(config_path)
+  course_by_title = config["projects"]
+  start_date = datetime.strptime(config["start_date"], '%Y-%m-%d')  # used for week calculation
+
+  # One listing of the organization's projects serves every course
+  try:
+      projects = list_projects(token, config["organization"])
+  except gha.GitHubQueryError as e:
+      print("Failed to fetch data:", e)
+      return 1
+  project_by_title = {project["title"]: project for project in projects}
+  missing = [title for title in course_by_title if title not in project_by_title]
+  if missing:
+      # Syncing without a project would prune all of its posts, so stop before writing anything
+      print(f"❌ Projects not found: {', '.join(missing)} "
+            f"(available: {', '.join(project['title'] for project in projects)}); update {config_path}")
+      return 1
+  selected = [project_by_title[title] for title in course_by_title]
+
+  # Projects are fetched in parallel, then merged and written in config order
+  with ThreadPoolExecutor(max_workers=max(1, min(8, len(selected)))) as executor:
+      futures = [executor.submit(render_project_posts, token, project, course_by_title[project["title"]], start_date)
+                 for project in selected]
+      rendered = []
+      for project, future in zip(selected, futures):
+          try:
+              rendered.append((project["title"], future.result()))
+          except gha.GitHubQueryError as e:
+              print(f"❌ {project['title']}: {e}")
+  if len(rendered) < len(selected):
+      # A partial merge would prune the failed project's posts
+      return 1
+
+  sync = sync_project_posts(config["organization"], rendered)
+  print(f"✅ {', '.join(course_by_title)}: {sync.summary()}")
+  return 0
 
 
 # Not used in this script, but can be used to get the token
@@ -173,7 +264,7 @@ def getToken():
 
     try:
         # Make a POST request (or GET, PUT, DELETE, etc. depending on your API)
-        response = requests.post(api_endpoint, headers=headers)
+        response = gha.client.post(api_endpoint, headers=headers)
 
         # Check if the request was successful (status code 200)
         if response.status_code == 200:
@@ -187,4 +278,4 @@ def getToken():
 
     
 if __name__ == "__main__":
-    create_issues()
\ No newline at end of file
+    sys.exit(create_issues())
\ No newline at end of file
@@ -5,25 +5,32 @@ Automated Multi-Course File Splitter for Jekyll
 This script automatically detects markdown files with multiple course assignments
 and splits them into separate course-specific files with unique permalinks.
 
+Notebooks are split at the markdown stage: `make convert` turns each notebook into
+a single _posts/*_IPYNB_2_.md post, and that post is split like any other markdown
+file (thin per-course wrappers that include_relative one shared body). No per-course
+notebook copies are made, so conversion work doesn't grow with the number of courses.
+
+Generated files are recorded in a manifest (.build_cache/split_manifest.json) keyed
+by source path, stat signature and content hash, so warm builds skip unchanged
+sources without reading them and `clean` removes exactly what was generated.
+
 Usage:
     python3 scripts/split_multi_course_files.py
+    python3 scripts/split_multi_course_files.py clean
 """
 
 import os
 import re
 import yaml
 import json
+import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-def parse_front_matter(content, file_path):
-    """Parse Jekyll front matter from markdown or notebook content."""
-    if file_path.suffix == '.ipynb':
-        return parse_notebook_front_matter(content)
-    else:
-        return parse_markdown_front_matter(content)
+SPLIT_MANIFEST = Path('.build_cache') / 'split_manifest.json'
 
-def parse_markdown_front_matter(content):
-    """Parse Jekyll front matter from markdown content."""
+def parse_markdown_front_matter(content, source=None):
+    """Parse Jekyll front matter from markdown content (source names the file in error reports)."""
     if not content.startswith('---'):
         return None, content
     
@@ -40,47 +47,40 @@ def parse_markdown_front_matter(content):
         front_matter = yaml.safe_load(front_matter_text)
         return front_matter, body_content
     except yaml.YAMLError as e:
-        print(f"Error parsing YAML: {e}")
+        print(f"❌ Error parsing YAML front matter{f' in {source}' if source else ''}: {e}")
         return None, content
 
-def parse_notebook_front_matter(content):
-    """Parse Jekyll front matter from notebook content."""
-    try:
-        notebook = json.loads(content)
-        if 'cells' not in notebook or len(notebook['cells']) == 0:
-            return None, content
-        
-        # Check if first cell is raw and contains front matter
-        first_cell = notebook['cells'][0]
-        if first_cell.get('cell_type') != 'raw':
-            return None, content
-            
-        # Join all source lines (notebook stores as array of strings)
-        cell_source = ''.join(first_cell.get('source', []))
-        if not cell_source.startswith('---'):
-            return None, content
-            
-        # Find the end of front matter  
-        end_match = re.search(r'\n---(\n|$)', cell_source[3:])
-        if not end_match:
-            # Try without newline after --- (some notebooks may not have trailing newline)
-            if cell_source.endswith('---'):
-                front_matter_text = cell_source[3:-3]
-            else:
-                return None, content
+def read_markdown_header(file_path):
+    """Read only the leading --- block of a markdown file (stops at the closing ---)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+        if not first_line.startswith('---'):
+            return None
+        header_lines = [first_line]
+        for line in f:
+            header_lines.append(line)
+            if line == '---\n':
+                break
         else:
-            front_matter_text = cell_source[3:end_match.start() + 3]
-        
-        try:
-            front_matter = yaml.safe_load(front_matter_text)
-            return front_matter, content  # Return full notebook content
-        except yaml.YAMLError as e:
-            print(f"Error parsing YAML: {e}")
-            return None, content
-            
-    except json.JSONDecodeError as e:
-        print(f"Error parsing notebook JSON: {e}")
-        return None, content
+            return None
+    return ''.join(header_lines)
+
+def read_front_matter_header(file_path):
+    """Parse front matter by reading only the file header (no body content)."""
+    header = read_markdown_header(file_path)
+    # Only files that mention courses can be multi-course; skip the YAML parse otherwise
+    if header is None or 'courses' not in header:
+        return None
+    front_matter, _ = parse_markdown_front_matter(header, file_path)
+    return front_matter
+
+def scan_header(file_path):
+    """Thread-pool task: return (file_path, front_matter) or report the error."""
+    try:
+        return file_path, read_front_matter_header(file_path)
+    except Exception as e:
+        print(f"❌ Error processing {file_path}: {e}")
+        return file_path, None
 
 def has_multiple_courses(front_matter):
     """Check if a file has multiple course assignments."""
@@ -92,12 +92,23 @@ def has_multiple_courses(front_matter):
         return len(courses) > 1
     return False
 
+def write_if_changed(file_path, content):
+    """Write content only if the file doesn't already hold it (keeps mtimes stable for Jekyll)."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
 def create_course_specific_file(original_path, front_matter, body_content, course, course_data):
     """Create a course-specific file with modified front matter and include."""
     # Generate new filename with appropriate extension
     original_name = original_path.stem
-    file_extension = original_path.suffix
-    course_filename = f"{original_name}_{course}{file_extension}"
+    course_filename = f"{original_name}_{course}.md"
     course_file_path = original_path.parent / course_filename
     
     # Create new front matter for this course
@@ -109,12 +120,8 @@ def create_course_specific_file(original_path, front_matter, body_content, cours
         original_permalink = new_front_matter['permalink'].rstrip('/')
         new_front_matter['permalink'] = f"{original_permalink}/{course}/"
     
-    if original_path.suffix == '.ipynb':
-        create_notebook_course_file(original_path, course_file_path, new_front_matter, body_content)
-    else:
-        create_markdown_course_file(original_path, course_file_path, new_front_matter)
-    
-    print(f"✓ Created course-specific file: {course_file_path}")
+    if create_markdown_course_file(original_path, course_file_path, new_front_matter):
+        print(f"✓ Created course-specific file: {course_file_path}")
     return course_file_path
 
 def create_markdown_course_file(original_path, course_file_path, new_front_matter):
@@ -127,112 +134,181 @@ def create_markdown_course_file(original_path, course_file_path, new_front_matte
 
 {{% include_relative {content_filename} %}}"""
     
-    with open(course_file_path, 'w', encoding='utf-8') as f:
-        f.write(course_content)
-
-def create_notebook_course_file(original_path, course_file_path, new_front_matter, notebook_content):
-    """Create a notebook course-specific file."""
-    try:
-        notebook = json.loads(notebook_content)
-        
-        # Update front matter in first cell
-        if notebook['cells'] and notebook['cells'][0].get('cell_type') == 'raw':
-            yaml_content = yaml.dump(new_front_matter, default_flow_style=False, allow_unicode=True)
-            new_front_matter_content = f"---\n{yaml_content}---\n"
-            notebook['cells'][0]['source'] = [new_front_matter_content]
-        
-        # Write the modified notebook
-        with open(course_file_path, 'w', encoding='utf-8') as f:
-            json.dump(notebook, f, indent=2)
-            
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"Error creating notebook course file: {e}")
+    return write_if_changed(course_file_path, course_content)
 
 def create_content_only_file(original_path, body_content):
     """Create a content-only version for includes (without modifying original)."""
-    # Only create content files for markdown (notebooks don't use includes)
-    if original_path.suffix == '.md':
-        content_filename = f"{original_path.stem}_content.md"
-        content_file_path = original_path.parent / content_filename
-        
-        # Write content-only file
-        with open(content_file_path, 'w', encoding='utf-8') as f:
-            f.write(body_content)
-        
+    content_filename = f"{original_path.stem}_content.md"
+    content_file_path = original_path.parent / content_filename
+    
+    # Write content-only file
+    if write_if_changed(content_file_path, body_content):
         print(f"✓ Created content file: {content_file_path}")
-        return content_file_path
-    return None
+    return content_file_path
+
+def load_split_manifest():
+    """Load the split manifest: {'sources': {path: {signature, sha256, courses, outputs}}}."""
+    try:
+        with open(SPLIT_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get('sources'), dict):
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {'sources': {}}
+
+def save_split_manifest(manifest):
+    """Write the split manifest atomically."""
+    SPLIT_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SPLIT_MANIFEST.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, SPLIT_MANIFEST)
+
+def remove_outputs(outputs, keep=()):
+    """Delete generated files, except those in keep. Returns the removed paths."""
+    removed = []
+    for output in outputs:
+        if output in keep:
+            continue
+        try:
+            os.remove(output)
+            removed.append(output)
+        except FileNotFoundError:
+            pass
+    return removed
+
+def split_file(file_path, front_matter, body_content):
+    """Generate the content file and course files for a multi-course source. Returns output paths."""
+    outputs = [str(create_content_only_file(file_path, body_content))]
+    for course, course_data in front_matter['courses'].items():
+        outputs.append(str(create_course_specific_file(file_path, front_matter, body_content, course, course_data)))
+    return outputs
 
 def find_and_split_multi_course_files():
-    """Find all markdown and notebook files with multiple courses and split them."""
-    # Check both _posts and _notebooks directories
-    directories = []
-    for dir_name in ['_posts', '_notebooks']:
-        dir_path = Path(dir_name)
-        if dir_path.exists():
-            directories.append(dir_path)
-    
-    if not directories:
-        print("❌ Neither _posts nor _notebooks directory found")
+    """Find all markdown files (including converted notebook posts) with multiple courses and split them."""
+    posts_dir = Path('_posts')
+    if not posts_dir.exists():
+        print("❌ _posts directory not found")
         return
     
+    manifest = load_split_manifest()
+    sources = manifest['sources']
+    manifest_changed = False
     processed_files = []
     
-    # Find all markdown and notebook files
-    for directory in directories:
-        for file_pattern in ['*.md', '*.ipynb']:
-            for file_path in directory.rglob(file_pattern):
-                # Skip already split files
-                if re.search(r'_(csp|csa|csse|cwgu)\.(md|ipynb)$', str(file_path)):
+    # Generated files are known from the manifest, so no course codes are needed to skip them
+    generated = {output for entry in sources.values() for output in entry.get('outputs', [])}
+    
+    # Find all markdown files; unchanged sources (same mtime/size, outputs present) are skipped.
+    # Sources recorded from older runs (e.g. per-course notebook copies) that are no longer
+    # scanned fall out of `seen` and have their outputs removed below.
+    seen = set()
+    changed_files = []
+    for file_path in posts_dir.rglob('*.md'):
+        key = str(file_path)
+        if key in generated:
+            continue
+        seen.add(key)
+        
+        stat = file_path.stat()
+        signature = [stat.st_mtime_ns, stat.st_size]
+        entry = sources.get(key)
+        if (entry and entry['signature'] == signature
+                and all(os.path.exists(output) for output in entry.get('outputs', []))):
+            continue
+        changed_files.append((file_path, signature))
+    
+    # Scan only the front matter headers of changed files, in parallel
+    signatures = dict(changed_files)
+    multi_course_files = []
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        for file_path, front_matter in executor.map(scan_header, list(signatures)):
+            key = str(file_path)
+            if has_multiple_courses(front_matter):
+                multi_course_files.append(file_path)
+                continue
+            # Single-course file: remember it so it isn't rescanned, and drop anything it used to generate
+            old_outputs = sources.get(key, {}).get('outputs', [])
+            for removed in remove_outputs(old_outputs):
+                print(f"🗑️  Removed stale file: {removed}")
+            sources[key] = {'signature': signatures[file_path], 'courses': [], 'outputs': []}
+            manifest_changed = True
+    
+    # Full reads only for the files that actually need splitting
+    for file_path in sorted(multi_course_files):
+        key = str(file_path)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            entry = sources.get(key, {})
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            front_matter, body_content = parse_markdown_front_matter(content, file_path)
+            if not has_multiple_courses(front_matter):
+                sources[key] = {'signature': signatures[file_path], 'courses': [], 'outputs': []}
+                manifest_changed = True
+                continue
+            courses = sorted(front_matter['courses'])
+            
+            if entry.get('sha256') == digest and entry.get('courses') == courses:
+                # Only the mtime changed (e.g. touched); outputs are regenerated only if missing
+                if all(os.path.exists(output) for output in entry['outputs']):
+                    entry['signature'] = signatures[file_path]
+                    manifest_changed = True
                     continue
-                    
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    front_matter, body_content = parse_front_matter(content, file_path)
-                    
-                    if has_multiple_courses(front_matter):
-                        print(f"\nProcessing multi-course file: {file_path}")
-                        courses = front_matter['courses']
-                        
-                        # Create content-only file (for markdown includes only)
-                        create_content_only_file(file_path, body_content)
-                        
-                        # Create course-specific files  
-                        for course, course_data in courses.items():
-                            create_course_specific_file(file_path, front_matter, body_content, course, course_data)
-                        
-                        processed_files.append(str(file_path))
-                
-                except Exception as e:
-                    print(f"❌ Error processing {file_path}: {e}")
+            
+            print(f"\nProcessing multi-course file: {file_path}")
+            outputs = split_file(file_path, front_matter, body_content)
+            
+            # Remove files for courses that were dropped from the source
+            for removed in remove_outputs(entry.get('outputs', []), keep=set(outputs)):
+                print(f"🗑️  Removed stale file: {removed}")
+            
+            sources[key] = {
+                'signature': signatures[file_path],
+                'sha256': digest,
+                'courses': courses,
+                'outputs': outputs,
+            }
+            manifest_changed = True
+            processed_files.append(key)
+        
+        except Exception as e:
+            print(f"❌ Error processing {file_path}: {e}")
+    
+    # Sources that were deleted: remove their generated files
+    for key in [k for k in sources if k not in seen]:
+        for removed in remove_outputs(sources[key].get('outputs', [])):
+            print(f"🗑️  Removed stale file: {removed}")
+        del sources[key]
+        manifest_changed = True
+    
+    if manifest_changed:
+        save_split_manifest(manifest)
     
     if processed_files:
         print(f"\n✅ Successfully processed {len(processed_files)} multi-course files:")
         for file_path in processed_files:
             print(f"   - {file_path}")
+    elif any(entry.get('outputs') for entry in sources.values()):
+        print("\n✅ Multi-course files are up to date")
     else:
         print("\n✅ No multi-course files found to split")
 
 def clean_split_files():
-    """Remove all generated course-specific and content files."""
-    directories = []
-    for dir_name in ['_posts', '_notebooks']:
-        dir_path = Path(dir_name)
-        if dir_path.exists():
-            directories.append(dir_path)
+    """Remove all generated course-specific and content files recorded in the manifest."""
+    manifest = load_split_manifest()
+    sources = manifest['sources']
     
     removed_files = []
+    for key in [k for k, entry in sources.items() if entry.get('outputs')]:
+        removed_files.extend(remove_outputs(sources[key]['outputs']))
+        # Forget the source so the next split regenerates its files
+        del sources[key]
     
-    # Find and remove course-specific files and content files
-    for directory in directories:
-        for file_pattern in ['*.md', '*.ipynb']:
-            for file_path in directory.rglob(file_pattern):
-                if (re.search(r'_(csp|csa|csse|cwgu)\.(md|ipynb)$', str(file_path)) or 
-                    re.search(r'_content\.md$', str(file_path))):
-                    file_path.unlink()
-                    removed_files.append(str(file_path))
+    if SPLIT_MANIFEST.exists():
+        save_split_manifest(manifest)
     
     if removed_files:
         print(f"✅ Cleaned {len(removed_files)} generated files")
@@ -253,4 +329,4 @@ def main():
         find_and_split_multi_course_files()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -6,20 +6,61 @@ This script scans all SCSS files in the project, extracts color variables,
 and generates a consolidated color map file along with supporting documentation.
 
 Usage: 
-    python3 scripts/update_color_map.py
+    python3 scripts/update_color_map.py [theme]
 
 Output Files:
     - _sass/root-color-map.scss: SCSS file with all color variables and CSS custom properties
     - colors.json: JSON manifest of all discovered colors
     - local-color-usage-report.md: Detailed markdown report of color usage
 
+Generated outputs are also cached per theme in .build_cache/themes/, keyed by a
+hash of the SCSS inputs plus the theme's own files (everything the Makefile's
+use-<theme> target copies from _themes/<theme>/, and the active _config.yml),
+so switching back to a theme is a cache lookup.
+
 Author: Auto-generated color management system
 """
 
+import hashlib
+import heapq
 import json
+import os
 import re
+import sys
 from pathlib import Path
-from collections import OrderedDict
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# Patterns are compiled once and shared by every file parsed
+LINE_COMMENT = re.compile(r'//.*$', re.MULTILINE)
+BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+VARIABLE_DEFINITION = re.compile(r'\$([a-zA-Z_][a-zA-Z0-9_-]*)\s*:=?\s*([^;]+);')
+DEFAULT_FLAG = re.compile(r'\s*!default\s*$')
+VARIABLE_REFERENCE = re.compile(r'\$([\w-]+)')
+SCSS_STATEMENT = re.compile(
+    r'@(import|use|forward)\s+([^;]+);|\$([a-zA-Z_][a-zA-Z0-9_-]*)\s*:=?\s*([^;]+);')
+IMPORT_TARGET = re.compile(r'["\']([^"\']+)["\']')
+
+# Bump when the cached statement format changes
+SYMBOL_CACHE_VERSION = 1
+
+
+def parse_scss_file(path_str, known_sha256=None):
+    """
+    Read, hash and parse one SCSS file (run in a worker process).
+    
+    Returns:
+        tuple: (sha256, statements), with statements None when the content hash
+               matches known_sha256 and the cached parse can be reused
+    """
+    data = Path(path_str).read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == known_sha256:
+        return sha256, None
+    # Read file content with UTF-8 encoding, ignoring errors
+    content = data.decode('utf-8', errors='ignore')
+    return sha256, ColorMapUpdater().parse_scss_statements(content)
 
 
 class ColorMapUpdater:
@@ -38,8 +79,11 @@ class ColorMapUpdater:
         open_coding_dir (Path): Additional directory for SCSS files (open-coding)
         map_file (Path): Output path for the root color map SCSS file
         json_manifest (Path): Output path for the JSON color manifest
+        symbol_cache_file (Path): Cache of parsed SCSS statements, keyed by file content hash
+        theme_cache_dir (Path): Per-theme cache of generated outputs
         all_colors (OrderedDict): Dictionary storing all discovered color variables
-                                  Format: {var_name: {'value': str, 'files': [str]}}
+                                  Format: {var_name: {'value': str, 'resolved': str, 'files': [str]}}
+        cycles (list): Circular variable references found while resolving
     """
     
     def __init__(self):
@@ -57,9 +101,22 @@ class ColorMapUpdater:
         self.map_file = Path('_sass/root-color-map.scss')
         self.json_manifest = Path('colors.json')
         
+        # Parsed SCSS statements cached per file content hash
+        self.symbol_cache_file = Path('.build_cache/scss_symbols.json')
+        
+        # Generated outputs cached per theme, keyed by the hash of the SCSS inputs
+        self.theme_cache_dir = Path('.build_cache/themes')
+        
+        # Content hash of each parsed SCSS file, and the outputs written this run
+        self.file_hashes = {}
+        self.outputs = {}
+        
         # Storage for all discovered color variables
         # OrderedDict preserves insertion order for consistent output
         self.all_colors = OrderedDict()
+        
+        # Circular variable references found while resolving, e.g. ['$a -> $b -> $a']
+        self.cycles = []
     
     def find_all_scss_files(self):
         """
@@ -110,34 +167,343 @@ class ColorMapUpdater:
             - Returns the LAST definition if multiple exist (last wins in SCSS)
             - Removes !default flag from returned value
         """
-        # Remove single-line comments (// ...) to avoid false matches
-        scss_content = re.sub(r'//.*$', '', scss_content, flags=re.MULTILINE)
-        
-        # Remove multi-line comments (/* ... */) to avoid false matches
-        scss_content = re.sub(r'/\*.*?\*/', '', scss_content, flags=re.DOTALL)
-        
-        # Match variable definition with either : or := assignment
-        # Pattern explanation: $var-name : value ;
-        #   - Escaped variable name (could contain special regex chars)
-        #   - Optional whitespace
-        #   - Either : or := for assignment
-        #   - Optional whitespace
-        #   - Capture group for value (everything up to semicolon)
-        #   - Semicolon terminator
-        pattern = rf'{re.escape(variable_name)}\s*:=?\s*([^;]+);'
-        matches = re.findall(pattern, scss_content)
-        
-        if matches:
-            # Return the last definition (SCSS uses last-wins for variable redefinition)
-            value = matches[-1].strip()
-            
-            # Remove !default flag if present (used for the default values that can be overridden)
-            value = re.sub(r'\s*!default\s*$', '', value)
-            return value
+        symbols = self.parse_symbol_table(scss_content)
+        return symbols.get(self.symbol_key(variable_name.lstrip('$')))
+    
+    def parse_variable_definitions(self, scss_content):
+        """
+        Parse every SCSS variable definition in content, in source order.
+        
+        Comments are stripped once per file, so callers that need several
+        variables from the same content should parse once and reuse the result
+        (see parse_symbol_table) instead of searching the content per variable.
+        
+        Args:
+            scss_content (str): The SCSS file content to parse
+        
+        Returns:
+            list[tuple[str, str]]: (name without '$', value without !default) pairs
+        """
+        return [(statement[1], statement[2])
+                for statement in self.parse_scss_statements(scss_content)
+                if statement[0] == 'define']
+    
+    def symbol_key(self, name):
+        """
+        Normalize a variable name for symbol table lookups.
+        
+        Sass treats hyphens and underscores in identifiers as equivalent,
+        so $font_size and $font-size refer to the same variable.
+        """
+        return name.replace('_', '-')
+    
+    def parse_symbol_table(self, scss_content, definitions=None):
+        """
+        Build a symbol table of variable values for one SCSS file.
+        
+        Args:
+            scss_content (str): The SCSS file content
+            definitions (list, optional): Already parsed definitions for this content
+        
+        Returns:
+            dict: {normalized name: value}; later definitions win, as in SCSS
+        """
+        if definitions is None:
+            definitions = self.parse_variable_definitions(scss_content)
+        return {self.symbol_key(name): value for name, value in definitions}
+    
+    def parse_scss_statements(self, scss_content):
+        """
+        Parse the variable definitions and imports of an SCSS file, in source order.
+        
+        Order matters for Sass scoping: an @import pulls the imported file's
+        variables in at that point, and a later `!default` definition only
+        applies if the variable is still undefined.
+        
+        Args:
+            scss_content (str): The SCSS file content to parse
         
+        Returns:
+            list: Statements as ['define', name, value, is_default] (value without
+                  !default) or ['import', [target, ...]] for @import/@use/@forward
+        """
+        # Strip comments to avoid extracting variables from commented code
+        scss_content = LINE_COMMENT.sub('', scss_content)
+        scss_content = BLOCK_COMMENT.sub('', scss_content)
+        
+        statements = []
+        for rule, targets, var_name, value in SCSS_STATEMENT.findall(scss_content):
+            if rule:
+                # @import url(...) is a plain CSS import
+                if not targets.lstrip().startswith('url('):
+                    statements.append(['import', IMPORT_TARGET.findall(targets)])
+            else:
+                value = value.strip()
+                statements.append(['define', var_name, DEFAULT_FLAG.sub('', value),
+                                   bool(DEFAULT_FLAG.search(value))])
+        return statements
+    
+    def resolve_import(self, target, importer):
+        """
+        Find the SCSS file an @import/@use target refers to.
+        
+        Tries the importing file's directory first, then the load paths
+        (_sass, open-coding), checking partials (_name.scss) and index files
+        the way Sass does.
+        
+        Args:
+            target (str): The import target, e.g. 'root-color-map' or 'minima/base'
+            importer (Path): The file containing the import
+        
+        Returns:
+            Path or None: The resolved file, or None for CSS, URLs, built-in
+                          modules (sass:math) and files that don't exist
+        """
+        if target.startswith(('sass:', 'http:', 'https:', '//')) or target.endswith('.css'):
+            return None
+        
+        target_path = Path(target)
+        stem = target_path.name[:-5] if target_path.name.endswith('.scss') else target_path.name
+        for base in (importer.parent, self.scss_dir, self.open_coding_dir):
+            directory = base / target_path.parent
+            for candidate in (directory / f'{stem}.scss', directory / f'_{stem}.scss',
+                              directory / stem / '_index.scss', directory / stem / 'index.scss'):
+                if candidate.is_file():
+                    return candidate
         return None
     
-    def extract_all_color_variables(self, scss_content, file_path):
+    def load_parsed_files(self, scss_files):
+        """
+        Read and parse SCSS files, reusing cached parses for unchanged files.
+        
+        Files whose size and mtime match the cache are not read at all; files
+        that were touched but whose content hash is unchanged are not reparsed.
+        Changed files are parsed in a process pool.
+        The cache lives in .build_cache/scss_symbols.json and is only rewritten
+        when an entry changed.
+        
+        Args:
+            scss_files (list[Path]): Files to load
+        
+        Returns:
+            dict: {Path: list of statements from parse_scss_statements}
+        """
+        try:
+            cache = json.loads(self.symbol_cache_file.read_text())
+            if cache.get('version') != SYMBOL_CACHE_VERSION:
+                cache = {}
+        except (OSError, ValueError):
+            cache = {}
+        entries = cache.get('files', {})
+        
+        updated = {}
+        pending = {}
+        for scss_file in scss_files:
+            key = scss_file.as_posix()
+            entry = entries.get(key)
+            try:
+                stat = scss_file.stat()
+            except OSError as e:
+                # Log error but continue processing other files
+                print(f"   Error reading {scss_file}: {e}")
+                continue
+            if entry and (entry['mtime_ns'], entry['size']) == (stat.st_mtime_ns, stat.st_size):
+                updated[key] = entry
+            else:
+                pending[scss_file] = (key, stat, entry)
+        
+        # Hash and parse new or touched files, in worker processes when there is more than one
+        outcomes = {}
+        if len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                futures = {
+                    executor.submit(parse_scss_file, str(scss_file), entry['sha256'] if entry else None): scss_file
+                    for scss_file, (key, stat, entry) in pending.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        outcomes[futures[future]] = future.result()
+                    except Exception as e:
+                        outcomes[futures[future]] = e
+        else:
+            for scss_file, (key, stat, entry) in pending.items():
+                try:
+                    outcomes[scss_file] = parse_scss_file(str(scss_file), entry['sha256'] if entry else None)
+                except Exception as e:
+                    outcomes[scss_file] = e
+        
+        for scss_file, (key, stat, entry) in pending.items():
+            outcome = outcomes[scss_file]
+            if isinstance(outcome, Exception):
+                # Log error but continue processing other files
+                print(f"   Error reading {scss_file}: {outcome}")
+                continue
+            sha256, statements = outcome
+            if statements is not None:
+                entry = {'sha256': sha256, 'statements': statements}
+            updated[key] = {**entry, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        
+        parsed = {scss_file: updated[scss_file.as_posix()]['statements']
+                  for scss_file in scss_files if scss_file.as_posix() in updated}
+        self.file_hashes = {key: entry['sha256'] for key, entry in updated.items()}
+        
+        # Only rewrite the cache when something changed (this also drops deleted files)
+        if updated != entries:
+            self.symbol_cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.symbol_cache_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps({'version': SYMBOL_CACHE_VERSION, 'files': updated}))
+            tmp_file.replace(self.symbol_cache_file)
+        
+        return parsed
+    
+    def build_import_graph(self, parsed):
+        """
+        Resolve the imports of every parsed file to other parsed files.
+        
+        Imports of files outside the scanned set (including the generated
+        root-color-map.scss) are ignored.
+        
+        Args:
+            parsed (dict): {Path: statements} from load_parsed_files
+        
+        Returns:
+            dict: {Path: {target: Path}} for imports that resolved to a parsed file
+        """
+        known = {path.resolve(): path for path in parsed}
+        graph = {}
+        for scss_file, statements in parsed.items():
+            imports = {}
+            for statement in statements:
+                if statement[0] == 'import':
+                    for target in statement[1]:
+                        resolved = self.resolve_import(target, scss_file)
+                        if resolved is not None and resolved.resolve() in known:
+                            imports[target] = known[resolved.resolve()]
+            graph[scss_file] = imports
+        return graph
+    
+    def apply_file_scope(self, scss_file, parsed, graph, symbols, active=None):
+        """
+        Evaluate a file's imports and variable definitions into a symbol table.
+        
+        Follows Sass scoping order: imported files are evaluated where they are
+        imported, later definitions override earlier ones, and `!default`
+        definitions only apply to variables that are not yet defined.
+        
+        Args:
+            scss_file (Path): File to evaluate
+            parsed (dict): {Path: statements} from load_parsed_files
+            graph (dict): Import graph from build_import_graph
+            symbols (dict): Symbol table to update in place
+            active (set, optional): Files currently being evaluated, to skip import cycles
+        
+        Returns:
+            dict: The updated symbol table
+        """
+        if active is None:
+            active = set()
+        if scss_file in active:
+            return symbols
+        active.add(scss_file)
+        
+        imports = graph.get(scss_file, {})
+        for statement in parsed[scss_file]:
+            if statement[0] == 'import':
+                for target in statement[1]:
+                    if target in imports:
+                        self.apply_file_scope(imports[target], parsed, graph, symbols, active)
+            else:
+                _, var_name, value, is_default = statement
+                key = self.symbol_key(var_name)
+                if not (is_default and key in symbols):
+                    symbols[key] = value
+        
+        active.discard(scss_file)
+        return symbols
+    
+    def build_global_symbol_table(self, parsed, graph):
+        """
+        Build the symbol table of the whole theme.
+        
+        Entry points (files no other file imports) are evaluated in sorted order,
+        each pulling in its imports, so variables shared through a common entry
+        stylesheet are visible to every partial.
+        
+        Args:
+            parsed (dict): {Path: statements} from load_parsed_files
+            graph (dict): Import graph from build_import_graph
+        
+        Returns:
+            dict: {normalized name: value}
+        """
+        imported = {path for imports in graph.values() for path in imports.values()}
+        symbols = {}
+        for scss_file in sorted(parsed):
+            if scss_file not in imported:
+                self.apply_file_scope(scss_file, parsed, graph, symbols)
+        return symbols
+    
+    def theme_input_hashes(self, theme):
+        """
+        Content hashes of a theme's own inputs: every file under _themes/<theme>/
+        (the _config.yml, Gemfile and layouts that make use-<theme> copies into
+        place, the _config.yml selecting the theme's SCSS) plus the active
+        _config.yml. Missing files are simply left out.
+        """
+        paths = [Path('_config.yml')]
+        if theme:
+            theme_dir = Path('_themes') / Path(theme).name
+            if theme_dir.is_dir():
+                paths.extend(path for path in theme_dir.rglob('*') if path.is_file())
+        return sorted(
+            (path.as_posix(), hashlib.sha256(path.read_bytes()).hexdigest())
+            for path in paths if path.is_file()
+        )
+    
+    def compute_bundle_key(self, theme):
+        """
+        Hash the inputs of a color bundle: the theme name and its own files
+        (theme_input_hashes), every parsed SCSS file's content hash, and this
+        script (so generator changes invalidate bundles).
+        
+        Call after load_parsed_files, which fills in file_hashes.
+        """
+        inputs = {
+            'theme': theme,
+            'theme_files': self.theme_input_hashes(theme),
+            'script': hashlib.sha256(Path(__file__).read_bytes()).hexdigest(),
+            'files': sorted(self.file_hashes.items())
+        }
+        return hashlib.sha256(json.dumps(inputs).encode('utf-8')).hexdigest()
+    
+    def theme_bundle_path(self, theme):
+        """Path of the cached output bundle for a theme ('default' when none is given)"""
+        return self.theme_cache_dir / f"{Path(theme or 'default').name}.json"
+    
+    def load_theme_bundle(self, theme, key):
+        """
+        Load a theme's cached outputs if they were generated from the same inputs.
+        
+        Returns:
+            dict or None: {output path: content}, or None if missing or stale
+        """
+        try:
+            bundle = json.loads(self.theme_bundle_path(theme).read_text())
+        except (OSError, ValueError):
+            return None
+        if bundle.get('key') != key:
+            return None
+        return bundle.get('outputs')
+    
+    def save_theme_bundle(self, theme, key):
+        """Cache the outputs written this run as the theme's bundle"""
+        bundle_path = self.theme_bundle_path(theme)
+        bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = bundle_path.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps({'key': key, 'outputs': self.outputs}))
+        tmp_file.replace(bundle_path)
+    
+    def extract_all_color_variables(self, scss_content, file_path, definitions=None):
         """
         Extract all SCSS color variables from file content.
         
@@ -145,8 +511,11 @@ class ColorMapUpdater:
         for those that appear to be color-related based on their values.
         
         Args:
-            scss_content (str): The complete SCSS file content
+            scss_content (str): The complete SCSS file content (unused when
+                                definitions are given)
             file_path (Path): Path object for the source file (used for tracking)
+            definitions (list, optional): Already parsed (name, value) definitions for
+                                          this content, to avoid parsing it twice
         
         Returns:
             dict: Dictionary of color variables with structure:
@@ -164,21 +533,9 @@ class ColorMapUpdater:
         """
         colors = {}
         
-        # Strip comments to avoid extracting variables from commented code
-        scss_content = re.sub(r'//.*$', '', scss_content, flags=re.MULTILINE)
-        scss_content = re.sub(r'/\*.*?\*/', '', scss_content, flags=re.DOTALL)
-        
-        # Find all variable definitions in the content
-        # Pattern matches: $variable-name: value;
-        #   - $ literal
-        #   - Variable name (alphanumeric, underscore, hyphen; must start with letter/underscore)
-        #   - Optional whitespace
-        #   - : or := for assignment
-        #   - Optional whitespace
-        #   - Capture group for value
-        #   - Semicolon terminator
-        pattern = r'\$([a-zA-Z_][a-zA-Z0-9_-]*)\s*:=?\s*([^;]+);'
-        matches = re.findall(pattern, scss_content)
+        # Find all variable definitions in the content (comments stripped)
+        if definitions is None:
+            definitions = self.parse_variable_definitions(scss_content)
         
         # Get relative path for tracking where variables are defined
         # Use try-except to handle cases where file might be outside CWD
@@ -189,12 +546,7 @@ class ColorMapUpdater:
             rel_path = str(file_path)
         
         # Process each variable definition found
-        for var_name, value in matches:
-            value = value.strip()
-            
-            # Remove !default flag if present
-            value = re.sub(r'\s*!default\s*$', '', value)
-            
+        for var_name, value in definitions:
             # Only keep variables that look like color values
             # This filters out non-color variables (dimensions, fonts, etc.)
             if self.is_color_value(value):
@@ -268,19 +620,19 @@ class ColorMapUpdater:
         # If none of the above patterns match, likely not a color
         return False
     
-    def resolve_variable_references(self, value, scss_content, depth=0):
+    def resolve_variable_references(self, value, symbols, resolved=None):
         """
-        Recursively resolve SCSS variable references to their final values.
+        Resolve SCSS variable references in a value to their final values.
         
-        If a variable value contains references to other variables (e.g., $other-var),
-        this method attempts to resolve those references by looking them up in the
-        same SCSS content. Recursion continues until no more references are found
-        or the depth limit is reached.
+        References are looked up in a symbol table (see parse_symbol_table) and
+        resolved through resolve_symbol, which memoizes every variable it finishes
+        in `resolved`. Sharing one `resolved` dict across all values from the same
+        symbol table makes resolving a whole file linear in its size.
         
         Args:
             value (str): The value potentially containing variable references
-            scss_content (str): The SCSS content to search for variable definitions
-            depth (int): Current recursion depth (prevents infinite loops)
+            symbols (dict): Symbol table of {normalized name: value}
+            resolved (dict, optional): Memo of already resolved variables
         
         Returns:
             str: The value with all possible variable references resolved
@@ -290,38 +642,63 @@ class ColorMapUpdater:
             Output: "#ff0000"
         
         Note:
-            - Maximum recursion depth is 10 to prevent infinite loops
-            - Circular references will be partially resolved up to the depth limit
+            - Variables in a circular reference keep their literal values and the
+              cycle is recorded in self.cycles
             - If a referenced variable isn't found, the reference remains in the value
         """
-        # Prevent infinite recursion from circular variable references
-        # Example: $a: $b; $b: $a; would cause infinite loop
-        if depth > 10:
-            return value
-        
         # Early return if no variable references present
         if not value or '$' not in value:
             return value
         
-        # Extract all variable references from the value
-        # Matches: $variable-name, $another_var, etc.
-        var_refs = re.findall(r'\$[\w-]+', value)
+        if resolved is None:
+            resolved = {}
         
-        # Attempt to resolve each variable reference
-        for var_ref in var_refs:
-            # Look up the variable's value in the SCSS content
-            resolved = self.extract_variable_value(scss_content, var_ref)
-            
-            # Only replace if we found a definition and it's different
-            if resolved and resolved != var_ref:
-                # Recursively resolve in case the value contains more variables
-                # Example: $primary: $base; where $base: $root; where $root: #fff
-                resolved = self.resolve_variable_references(resolved, scss_content, depth + 1)
-                
-                # Replace the variable reference with its resolved value
-                value = value.replace(var_ref, resolved)
+        return VARIABLE_REFERENCE.sub(
+            lambda match: self.resolve_symbol(match.group(1), symbols, resolved), value)
+    
+    def resolve_symbol(self, name, symbols, resolved, resolving=None):
+        """
+        Resolve one variable through the dependency graph of the symbol table.
         
-        return value
+        Walks the variable's references depth-first. Variables currently on the
+        walk are tracked in `resolving`, so a reference back to one of them is an
+        explicit cycle rather than something cut off by a depth limit.
+        
+        Args:
+            name (str): Variable name without '$'
+            symbols (dict): Symbol table of {normalized name: value}
+            resolved (dict): Memo of {normalized name: resolved value}
+            resolving (list, optional): Variables on the current walk, in order
+        
+        Returns:
+            str: The resolved value, or the original '$name' reference if the
+                 variable is undefined or part of a cycle
+        """
+        key = self.symbol_key(name)
+        if key in resolved:
+            return resolved[key]
+        if key not in symbols:
+            return f'${name}'
+        
+        if resolving is None:
+            resolving = []
+        if key in resolving:
+            cycle = resolving[resolving.index(key):] + [key]
+            self.cycles.append(' -> '.join(f'${var}' for var in cycle))
+            # Variables in a cycle keep their literal values
+            for var in cycle:
+                resolved[var] = symbols[var]
+            return f'${name}'
+        
+        resolving.append(key)
+        value = symbols[key]
+        if '$' in value:
+            value = VARIABLE_REFERENCE.sub(
+                lambda match: self.resolve_symbol(match.group(1), symbols, resolved, resolving), value)
+        resolving.pop()
+        
+        # setdefault keeps the literal value if this variable turned out to be in a cycle
+        return resolved.setdefault(key, value)
     
     def sanitize_variable_name(self, name):
         """
@@ -365,17 +742,23 @@ class ColorMapUpdater:
         # Return sanitized name, or 'color' if nothing remains
         return name if name else 'color'
     
-    def update_map(self):
+    def update_map(self, theme=None):
         """
         Main workflow: Scan local SCSS files and update the root color map.
         
         This method orchestrates the entire color extraction and generation process:
         1. Find all SCSS files in the project
-        2. Extract color variables from each file
-        3. Consolidate all colors into the all_colors dictionary
-        4. Generate output files (SCSS map, JSON manifest, usage report)
+        2. Parse them (reusing cached parses) and build the @import/@use graph
+        3. Extract color variables from each file and resolve their references
+        4. Consolidate all colors into the all_colors dictionary
+        5. Generate output files (SCSS map, JSON manifest, usage report)
         
         The method provides console output to show progress and results.
+        When the theme's cached bundle was generated from the same SCSS inputs,
+        steps 3-5 are replaced by restoring the cached outputs.
+        
+        Args:
+            theme (str, optional): Theme being activated (e.g. 'minima'), used to key the bundle cache
         
         Raises:
             Exception: Logs errors for individual file processing but continues
@@ -388,36 +771,111 @@ class ColorMapUpdater:
         
         print(f"\nExtracting color variables:")
         
-        # Step 2: Extract variables from each file
-        for scss_file in scss_files:
-            try:
-                # Read file content with UTF-8 encoding, ignoring errors
-                content = scss_file.read_text(encoding='utf-8', errors='ignore')
-                
-                # Extract all color variables from this file
-                colors = self.extract_all_color_variables(content, scss_file)
-                
-                # Step 3: Consolidate into master color dictionary
-                for var_name, info in colors.items():
-                    if var_name not in self.all_colors:
-                        # New variable - add it
-                        self.all_colors[var_name] = info
-                    else:
-                        # Variable exists - update value and merge file lists
-                        # Last definition wins (SCSS behavior)
-                        self.all_colors[var_name]['value'] = info['value']
-                        self.all_colors[var_name]['files'].extend(info['files'])
-                        
-            except Exception as e:
-                # Log error but continue processing other files
-                print(f"   Error reading {scss_file}: {e}")
+        # Step 2: Parse each file (cached by content hash) and build the import graph
+        parsed = self.load_parsed_files(scss_files)
+        
+        # Reuse the theme's bundle if nothing it was generated from has changed
+        bundle_key = self.compute_bundle_key(theme)
+        bundle = self.load_theme_bundle(theme, bundle_key)
+        if bundle is not None:
+            print(f"\nUsing cached color bundle for theme '{theme or 'default'}' (SCSS and theme inputs unchanged)")
+            for path, content in bundle.items():
+                self.write_output(Path(path), content)
+            return
+        
+        graph = self.build_import_graph(parsed)
+        global_symbols = self.build_global_symbol_table(parsed, graph)
+        
+        # Step 3: Extract variables from each file
+        for scss_file, statements in parsed.items():
+            definitions = [(statement[1], statement[2])
+                           for statement in statements if statement[0] == 'define']
+            
+            # Extract all color variables from this file
+            colors = self.extract_all_color_variables(None, scss_file, definitions)
+            
+            # Resolve references against the file's own scope (its imports and definitions),
+            # falling back to the whole theme for variables it relies on an entry point for
+            symbols = None
+            resolved = {}
+            for var_name, info in colors.items():
+                if '$' not in info['value']:
+                    info['resolved'] = info['value']
+                    continue
+                if symbols is None:
+                    symbols = ChainMap(self.apply_file_scope(scss_file, parsed, graph, {}), global_symbols)
+                # Resolve through the variable itself when it is in scope so that
+                # variables in a circular reference keep their literal value
+                if symbols.get(self.symbol_key(var_name)) == info['value']:
+                    info['resolved'] = self.resolve_symbol(var_name, symbols, resolved)
+                else:
+                    info['resolved'] = self.resolve_variable_references(info['value'], symbols, resolved)
+            
+            # Step 4: Consolidate into master color dictionary
+            for var_name, info in colors.items():
+                if var_name not in self.all_colors:
+                    # New variable - add it
+                    self.all_colors[var_name] = info
+                else:
+                    # Variable exists - update value and merge file lists
+                    # Last definition wins (SCSS behavior)
+                    self.all_colors[var_name]['value'] = info['value']
+                    self.all_colors[var_name]['resolved'] = info['resolved']
+                    self.all_colors[var_name]['files'].extend(info['files'])
         
         print(f"   ✓ Found {len(self.all_colors)} unique color variable(s)\n")
         
-        # Step 4: Generate all output files
+        # Report circular references left unresolved
+        for cycle in dict.fromkeys(self.cycles):
+            print(f"   Circular variable reference: {cycle}")
+        
+        # Step 5: Generate all output files
         self.write_map_file()
         self.write_json_manifest()
         self.write_usage_report()
+        
+        self.save_theme_bundle(theme, bundle_key)
+    
+    def write_output(self, path, content):
+        """
+        Write an output file only if its content changed.
+        
+        Leaving unchanged files untouched keeps their mtime, so Jekyll does not
+        recompile Sass when switching back and forth between themes.
+        
+        Args:
+            path (Path): Output file
+            content (str): Complete file content
+        
+        Returns:
+            bool: True if the file was written
+        """
+        self.outputs[path.as_posix()] = content
+        try:
+            if path.read_text() == content:
+                print(f"Unchanged: {path}")
+                return False
+        except OSError:
+            pass
+        path.write_text(content)
+        print(f"Successfully updated: {path}")
+        return True
+    
+    def group_colors_by_file(self):
+        """
+        Group color variables by the source files that define them, in one pass.
+        
+        Returns:
+            dict: {file: [(var_name, info), ...]} with variables in all_colors order
+        """
+        files_dict = {}
+        for var_name, info in self.all_colors.items():
+            for file in info['files']:
+                if file not in files_dict:
+                    files_dict[file] = []
+                # Store tuple of (variable_name, variable_info)
+                files_dict[file].append((var_name, info))
+        return files_dict
     
     def write_map_file(self):
         """
@@ -446,50 +904,45 @@ class ColorMapUpdater:
         
         Note:
             - Creates parent directories if they don't exist
-            - Overwrites existing file completely
+            - Only rewritten when the content changed
             - CSS custom properties use #{} interpolation for SCSS variables
         """
         # Generate file header with warnings and metadata
-        output = """// AUTO-GENERATED ROOT COLOR MAP FOR LOCAL STYLING
+        output = ["""// AUTO-GENERATED ROOT COLOR MAP FOR LOCAL STYLING
 // This file contains all color variables used across the local repository
 // Generated by scripts/update_color_map.py
 //
 // DO NOT EDIT MANUALLY - Run the script to regenerate
 
-"""
+"""]
         
         # Group variables by source file for better organization
         # This creates sections in the output file for each source SCSS file
-        files_dict = {}
-        for var_name, info in self.all_colors.items():
-            for file in info['files']:
-                if file not in files_dict:
-                    files_dict[file] = []
-                # Store tuple of (variable_name, variable_info)
-                files_dict[file].append((var_name, info))
+        files_dict = self.group_colors_by_file()
         
         # Write variables grouped by source file
         for file in sorted(files_dict.keys()):
             # Create a readable header for each source file section
             file_name = Path(file).name.upper()
-            output += f"\n// {file_name}\n"
-            output += "// " + "-" * 77 + "\n\n"
+            output.append(f"\n// {file_name}\n")
+            output.append("// " + "-" * 77 + "\n\n")
             
             # Write each variable from this file
             for var_name, info in sorted(files_dict[file], key=lambda x: x[0]):
                 # Ensure variable name is valid SCSS
                 sanitized = self.sanitize_variable_name(var_name)
-                output += f"${sanitized}: {info['value']};\n"
+                # Write the resolved value so the map does not depend on variables it doesn't define
+                output.append(f"${sanitized}: {info.get('resolved', info['value'])};\n")
         
         # Add CSS custom properties section
         # These allow the colors to be used in modern CSS without SCSS
-        output += """
+        output.append("""
 // =============================================================================
 // CSS CUSTOM PROPERTIES
 // =============================================================================
 
 :root {
-"""
+""")
         
         # Convert all SCSS variables to CSS custom properties
         for var_name in sorted(self.all_colors.keys()):
@@ -497,16 +950,15 @@ class ColorMapUpdater:
             # Convert underscores to hyphens for CSS custom property convention
             css_var = sanitized.replace('_', '-')
             # Use #{} interpolation to insert SCSS variable value into CSS
-            output += f"  --{css_var}: #{{${sanitized}}};\n"
+            output.append(f"  --{css_var}: #{{${sanitized}}};\n")
         
-        output += "}\n"
+        output.append("}\n")
         
         # Ensure output directory exists
         self.map_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Write the complete file
-        self.map_file.write_text(output)
-        print(f"Successfully updated: {self.map_file}")
+        self.write_output(self.map_file, ''.join(output))
     
     def write_json_manifest(self):
         """
@@ -525,7 +977,8 @@ class ColorMapUpdater:
               "total_colors": 42,
               "colors": {
                 "variable-name": {
-                  "value": "#ff0000",
+                  "value": "$primary",
+                  "resolved": "#ff0000",
                   "source_files": ["path/to/file.scss"]
                 }
               }
@@ -533,7 +986,7 @@ class ColorMapUpdater:
         
         Note:
             - Uses 2-space indentation for readability
-            - Overwrites existing file completely
+            - Only rewritten when the content changed
         """
         # Build the manifest structure
         manifest = {
@@ -546,12 +999,12 @@ class ColorMapUpdater:
         for var_name, info in self.all_colors.items():
             manifest['colors'][var_name] = {
                 'value': info['value'],
+                'resolved': info.get('resolved', info['value']),
                 'source_files': info['files']
             }
         
         # Write formatted JSON to file
-        self.json_manifest.write_text(json.dumps(manifest, indent=2))
-        print(f"Successfully updated: {self.json_manifest}")
+        self.write_output(self.json_manifest, json.dumps(manifest, indent=2))
     
     def write_usage_report(self):
         """
@@ -581,74 +1034,63 @@ class ColorMapUpdater:
             - Output file: local-color-usage-report.md in project root
         """
         # Initialize report with title
-        report = "# Local Color Usage Report\n\n"
+        report = ["# Local Color Usage Report\n\n"]
         
         # SECTION 1: Summary Statistics
-        report += f"## Summary\n\n"
-        report += f"- Total unique colors found: {len(self.all_colors)}\n"
+        report.append(f"## Summary\n\n")
+        report.append(f"- Total unique colors found: {len(self.all_colors)}\n")
         
-        # Count unique files that contain colors
-        all_files = set()
-        for info in self.all_colors.values():
-            all_files.update(info['files'])
-        report += f"- Files with colors: {len(all_files)}\n\n"
+        # Group colors by their source files (also gives the count of files with colors)
+        files_dict = self.group_colors_by_file()
+        report.append(f"- Files with colors: {len(files_dict)}\n\n")
         
         # SECTION 2: Colors organized by file
-        report += "## Colors by File\n\n"
-        
-        # Group colors by their source files
-        files_dict = {}
-        for var_name, info in self.all_colors.items():
-            for file in info['files']:
-                if file not in files_dict:
-                    files_dict[file] = []
-                files_dict[file].append((var_name, info))
+        report.append("## Colors by File\n\n")
         
         # Write a subsection for each file
         for file in sorted(files_dict.keys()):
             file_name = Path(file).name
-            report += f"### {file_name} ({len(files_dict[file])} colors)\n\n"
+            report.append(f"### {file_name} ({len(files_dict[file])} colors)\n\n")
             
             # List each color in this file
             for var_name, info in sorted(files_dict[file], key=lambda x: x[0]):
-                report += f"- `${var_name}`: `{info['value']}`\n"
+                report.append(f"- `${var_name}`: `{info['value']}`\n")
             
-            report += "\n"
+            report.append("\n")
         
         # SECTION 3: Colors used in multiple files
         # These are candidates for consolidation into a shared color palette
-        report += "## Colors Used in Multiple Files\n\n"
+        report.append("## Colors Used in Multiple Files\n\n")
         
-        # Filter for colors that appear in more than one file
-        multi_file_colors = [(var_name, info) for var_name, info in self.all_colors.items() 
-                             if len(info['files']) > 1]
-        
-        # Sort by frequency (most files first)
-        multi_file_colors.sort(key=lambda x: len(x[1]['files']), reverse=True)
+        # Top 20 colors that appear in more than one file, most files first
+        # (same order as a stable sort, without sorting every color)
+        multi_file_colors = heapq.nlargest(
+            20,
+            ((var_name, info) for var_name, info in self.all_colors.items() if len(info['files']) > 1),
+            key=lambda x: len(x[1]['files'])
+        )
         
         if multi_file_colors:
-            # Show top 20 most-used colors
-            for var_name, info in multi_file_colors[:20]:
-                report += f"### `${var_name}` ({len(info['files'])} files)\n\n"
-                report += f"**Value**: `{info['value']}`\n\n"
+            for var_name, info in multi_file_colors:
+                report.append(f"### `${var_name}` ({len(info['files'])} files)\n\n")
+                report.append(f"**Value**: `{info['value']}`\n\n")
                 
                 # List all files using this color
                 file_names = [Path(f).name for f in sorted(info['files'])]
-                report += f"**Files**: {', '.join(file_names)}\n\n"
+                report.append(f"**Files**: {', '.join(file_names)}\n\n")
         else:
-            report += "No colors are used in multiple files.\n\n"
+            report.append("No colors are used in multiple files.\n\n")
         
         # SECTION 4: Complete alphabetical listing
-        report += "## All Colors (Alphabetical)\n\n"
+        report.append("## All Colors (Alphabetical)\n\n")
         
         for var_name in sorted(self.all_colors.keys()):
             info = self.all_colors[var_name]
-            report += f"- **${var_name}**: `{info['value']}`\n"
+            report.append(f"- **${var_name}**: `{info['value']}`\n")
         
         # Write report to file
         report_path = Path('local-color-usage-report.md')
-        report_path.write_text(report)
-        print(f"Successfully updated: {report_path}")
+        self.write_output(report_path, ''.join(report))
 
 
 def main():
@@ -660,9 +1102,12 @@ def main():
     
     This function is called when the script is run directly from the command line.
     """
+    # Optional theme name (passed by the make use-<theme> targets)
+    theme = sys.argv[1] if len(sys.argv) > 1 else None
+    
     # Create updater instance and run the update process
     updater = ColorMapUpdater()
-    updater.update_map()
+    updater.update_map(theme)
     
     # Provide success message and next steps
     print(f"\nColor map updated!")
@@ -0,0 +1,116 @@
+"""
+Incremental sync in scripts/prs_issues.py against a stubbed GitHub GraphQL API.
+
+The stub replaces GitHubClient.request (the network call) only, so the
+client's response cache stays in the path with a live TTL.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import github_api_funcs as gha  # noqa: E402
+import prs_issues  # noqa: E402
+
+
+def make_item(item_id, updated_at):
+    return {
+        'id': item_id,
+        'title': f'Item {item_id}',
+        'body': 'body',
+        'url': f'https://github.com/o/r/{item_id}',
+        'createdAt': '2025-01-01T00:00:00Z',
+        'updatedAt': updated_at,
+        'author': {'login': 'author'},
+        'comments': {'nodes': [], 'pageInfo': {'endCursor': None, 'hasNextPage': False}}
+    }
+
+
+class FakeGraphQL:
+    """Answers the repository queries from in-memory issues and pull requests"""
+
+    def __init__(self):
+        self.items = {'issues': {}, 'pullRequests': {}}
+
+    def request(self, method, url, **kwargs):
+        payload = kwargs['json']
+        query, variables = payload['query'], payload['variables']
+        connection = 'issues' if 'issues(' in query else 'pullRequests'
+        nodes = sorted(self.items[connection].values(), key=lambda node: node['updatedAt'], reverse=True)
+        since = variables.get('since')
+        if since:
+            nodes = [node for node in nodes if node['updatedAt'] >= since]
+        if 'updatedAt' not in query:  # id-only listing
+            nodes = [{'id': node['id']} for node in nodes]
+        body = {'data': {'repository': {connection: {
+            'nodes': nodes,
+            'pageInfo': {'endCursor': None, 'hasNextPage': False}
+        }}}}
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+class IncrementalSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.mkdir('_posts')
+        self.api = FakeGraphQL()
+        self.saved = (gha.client.request, gha.client.cache_dir, gha.client.graphql_ttl)
+        gha.client.request = self.api.request
+        gha.client.cache_dir = Path('.build_cache/github')
+        gha.client.graphql_ttl = 300
+
+    def tearDown(self):
+        gha.client.request, gha.client.cache_dir, gha.client.graphql_ttl = self.saved
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def posts(self):
+        return sorted(os.listdir('_posts'))
+
+    def test_second_run_within_ttl_keeps_new_items(self):
+        self.api.items['issues']['I1'] = make_item('I1', '2025-02-01T00:00:00Z')
+        self.api.items['pullRequests']['P1'] = make_item('P1', '2025-02-01T00:00:00Z')
+        prs_issues.create_issues_and_prs('o', 'r')
+        self.assertEqual(len(self.posts()), 2)
+
+        # New items appear well inside the response cache TTL
+        self.api.items['issues']['I2'] = make_item('I2', '2025-02-02T00:00:00Z')
+        self.api.items['pullRequests']['P2'] = make_item('P2', '2025-02-02T00:00:00Z')
+        prs_issues.create_issues_and_prs('o', 'r')
+
+        self.assertEqual(self.posts(), [
+            '2025-01-01-Item-I1_GithubIssue.md',
+            '2025-01-01-Item-I2_GithubIssue.md',
+            '2025-01-01-Item-P1_GithubPR.md',
+            '2025-01-01-Item-P2_GithubPR.md'
+        ])
+        state = json.loads(Path('.build_cache/github_sync.json').read_text())['repo:o/r']
+        self.assertEqual(sorted(state['posts']), ['I1', 'I2', 'P1', 'P2'])
+        self.assertEqual(state['watermark'], '2025-02-02T00:00:00Z')
+
+    def test_deleted_item_loses_its_post(self):
+        self.api.items['issues']['I1'] = make_item('I1', '2025-02-01T00:00:00Z')
+        self.api.items['issues']['I2'] = make_item('I2', '2025-02-02T00:00:00Z')
+        prs_issues.create_issues_and_prs('o', 'r')
+
+        del self.api.items['issues']['I1']
+        prs_issues.create_issues_and_prs('o', 'r')
+
+        self.assertEqual(self.posts(), ['2025-01-01-Item-I2_GithubIssue.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()